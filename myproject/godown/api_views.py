@@ -6,7 +6,6 @@ from django.http import HttpResponse
 from sylvia.storage import krutrim_storage
 from sylvia.serializers import LoadingRequestImageSerializer
 from .models import LoadingRequestImage
-import requests
 
 
 class LoadingRequestImageViewSet(viewsets.ModelViewSet):
@@ -99,7 +98,7 @@ class LoadingRequestImageViewSet(viewsets.ModelViewSet):
             )
 
             # Fetch the image from Krutrim Storage
-            response = requests.get(image_url, headers=headers, timeout=30)
+            response = krutrim_storage.session.get(image_url, headers=headers, timeout=30)
 
             if response.status_code == 200:
                 # Determine content type
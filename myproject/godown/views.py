@@ -1196,7 +1196,7 @@ def loading_record_update(request, loading_request_id):
                 storage = KrutrimStorageClient()
 
                 # Check if this is the first image (make it primary if no images exist)
-                existing_images_count = loading_record.loading_images.count()
+                has_existing_images = loading_record.loading_images.exists()
 
                 for idx, image_file in enumerate(uploaded_images):
                     # Upload to Krutrim storage
@@ -1213,7 +1213,7 @@ def loading_record_update(request, loading_request_id):
                             original_filename=metadata['original_filename'],
                             file_size=metadata['file_size'],
                             content_type=metadata['content_type'],
-                            is_primary=(existing_images_count == 0 and idx == 0),  # First image is primary if no previous images
+                            is_primary=(not has_existing_images and idx == 0),  # First image is primary if no previous images
                             created_by=request.user
                         )
                         uploaded_count += 1
@@ -127,6 +127,28 @@ def get_database_config():
 DATABASES = get_database_config()
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+def get_cache_config():
+    if os.environ.get('DATABASE_URL'):
+        # Shared across gunicorn workers; table created by `manage.py createcachetable`
+        return {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                'LOCATION': 'django_cache',
+            }
+        }
+    else:
+        return {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            }
+        }
+
+CACHES = get_cache_config()
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -265,6 +287,8 @@ KRUTRIM_STORAGE_API_KEY = os.environ.get('KRUTRIM_STORAGE_API_KEY', '')
 KRUTRIM_STORAGE_BUCKET = os.environ.get('KRUTRIM_STORAGE_BUCKET', 'mrn-receipts-datastore')
 KRUTRIM_STORAGE_ENDPOINT = os.environ.get('KRUTRIM_STORAGE_ENDPOINT', '')
 KRUTRIM_STORAGE_REGION = os.environ.get('KRUTRIM_STORAGE_REGION', 'in-bangalore-1')
+# Redirect image requests to presigned storage URLs; set to false to proxy images through Django
+KRUTRIM_STORAGE_REDIRECT_IMAGES = os.environ.get('KRUTRIM_STORAGE_REDIRECT_IMAGES', 'true').lower() == 'true'
 
 # File Upload Settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
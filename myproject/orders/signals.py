@@ -0,0 +1,23 @@
+"""
+Django signals for keeping cached order list data fresh.
+"""
+
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from sylvia.models import Order
+from sylvia.signals import invalidate_after_commit
+from .views_order_list import order_stats_cache_key
+
+
+def drop_order_stats(organization_id):
+    """Drop the cached order list statistics of one organization"""
+    cache.delete(order_stats_cache_key(organization_id))
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def invalidate_order_stats(sender, instance, **kwargs):
+    """Drop the cached order list statistics once the order's transaction commits"""
+    invalidate_after_commit(drop_order_stats, instance.organization_id)
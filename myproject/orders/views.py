@@ -438,8 +438,7 @@ def update_order(request, order_id):
                             continue
             
             # Check if there are any remaining order items
-            remaining_items = OrderItem.objects.filter(order=order).count()
-            if remaining_items == 0:
+            if not OrderItem.objects.filter(order=order).exists():
                 # Add error message or prevent saving
                 logger.warning(f"Attempted to save order {order.order_number} with no products")
                 context = {
@@ -1016,6 +1015,7 @@ def auto_flag_slow_billing_dealers(user=None):
     CRITICAL, which is never auto-downgraded). Returns list of flagged dealers.
     """
     flagged = []
+    audit_entries = []
     for dealer in Dealer.objects.filter(is_active=True):
         avg = _compute_mrn_to_bill_avg(dealer)
         if avg is None:
@@ -1028,7 +1028,9 @@ def auto_flag_slow_billing_dealers(user=None):
                 f'(threshold: {MRN_TO_BILL_THRESHOLD} days).'
             )
             dealer.save()
-            AuditLog.objects.create(
+            audit_entries.append(AuditLog(
+                # bulk_create skips TenantBaseModel.save, so set the organization here
+                organization_id=dealer.organization_id,
                 action='DEALER_RISK_FLAGGED',
                 model_name='Dealer',
                 object_id=str(dealer.id),
@@ -1040,8 +1042,10 @@ def auto_flag_slow_billing_dealers(user=None):
                     'mrn_to_bill_avg': avg,
                     'auto_flagged': True,
                 },
-            )
+            ))
             flagged.append(dealer)
+    # One INSERT for the whole scan instead of one per flagged dealer
+    AuditLog.objects.bulk_create(audit_entries)
     return flagged
 
 
@@ -1270,14 +1274,16 @@ def unblock_dealer(request, dealer_id):
     return redirect('dealer_detail', dealer_id=dealer_id)
 
 
+VALID_RISK_FLAGS = frozenset(value for value, _ in Dealer.RISK_FLAG_CHOICES)
+
+
 @login_required
 def flag_dealer(request, dealer_id):
     if request.method != 'POST':
         return redirect('dealer_detail', dealer_id=dealer_id)
     dealer = get_object_or_404(Dealer, id=dealer_id)
     risk_flag = request.POST.get('risk_flag', 'NONE')
-    valid_flags = [c[0] for c in Dealer.RISK_FLAG_CHOICES]
-    if risk_flag not in valid_flags:
+    if risk_flag not in VALID_RISK_FLAGS:
         risk_flag = 'NONE'
     old_flag = dealer.risk_flag
     dealer.risk_flag = risk_flag
@@ -1,21 +1,39 @@
 import logging
 import json
 import base64
+import re
+import uuid
+from collections import defaultdict
+from io import BytesIO
 from decimal import Decimal, InvalidOperation
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.db import transaction
+from django.core.cache import cache
 from django.contrib import messages
 from sylvia.models import Vehicle, Dealer, Product, Order, OrderItem, Depot
+from sylvia.middleware import get_current_organization
 from datetime import datetime
 from django.utils import timezone
 import anthropic
+from PIL import Image, ImageOps
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+_QTY_RE = re.compile(r'(\d+\.?\d*)')
+# Outermost JSON array in a model response, tolerating surrounding prose
+_JSON_ARRAY_RE = re.compile(r'\[.*\]', re.S)
+
+# Extracted rows live in the cache; the session only carries their id
+DISPATCH_DATA_SESSION_KEY = 'extracted_dispatch_data_id'
+DISPATCH_DATA_CACHE_TIMEOUT = 1800  # seconds
+
+# Claude downsamples anything with a longer edge than this, so larger uploads only cost bandwidth and tokens
+MAX_IMAGE_EDGE = 1568
+
 # Configuration for anthropic client
 try:
     claude_client = anthropic.Anthropic(api_key=getattr(settings, 'ANTHROPIC_API_KEY', ''))
@@ -54,8 +72,8 @@ def process_dispatch_image(request):
         if not image_file.content_type.startswith('image/'):
             return JsonResponse({'error': 'Please upload a valid image file'}, status=400)
         
-        # Convert image to base64
-        image_data = image_file.read()
+        # Downscale and convert image to base64
+        image_data, media_type = downscale_image(image_file.read(), image_file.content_type)
         image_base64 = base64.b64encode(image_data).decode('utf-8')
         
         # Prepare Claude vision prompt with product and depot mapping
@@ -144,7 +162,7 @@ def process_dispatch_image(request):
                                 "type": "image",
                                 "source": {
                                     "type": "base64",
-                                    "media_type": image_file.content_type,
+                                    "media_type": media_type,
                                     "data": image_base64
                                 }
                             },
@@ -162,30 +180,23 @@ def process_dispatch_image(request):
             
             # Log the raw response for debugging
             
-            # Parse JSON response
+            # Parse the JSON array out of the response in a single pass
+            json_match = _JSON_ARRAY_RE.search(response_text)
+            if not json_match:
+                logger.error(f"No JSON array found in response: {response_text}")
+                return JsonResponse({
+                    'error': 'No valid data structure found in image analysis response. Please ensure the image contains a clear dispatch table.',
+                    'debug_info': f'Response preview: {response_text[:200]}...'
+                }, status=400)
+            
             try:
-                extracted_data = json.loads(response_text)
+                extracted_data = json.loads(json_match.group(0))
             except json.JSONDecodeError as e:
-                logger.error(f"JSON decode error: {e}")
-                # Try to extract JSON from response if it's wrapped in text
-                start_idx = response_text.find('[')
-                end_idx = response_text.rfind(']') + 1
-                if start_idx >= 0 and end_idx > start_idx:
-                    json_text = response_text[start_idx:end_idx]
-                    try:
-                        extracted_data = json.loads(json_text)
-                    except json.JSONDecodeError as e2:
-                        logger.error(f"Failed to parse extracted JSON: {e2}")
-                        return JsonResponse({
-                            'error': 'Could not parse response from image analysis. Please try again or check if the image is clear.',
-                            'debug_info': f'Response preview: {response_text[:200]}...'
-                        }, status=400)
-                else:
-                    logger.error(f"No JSON array found in response: {response_text}")
-                    return JsonResponse({
-                        'error': 'No valid data structure found in image analysis response. Please ensure the image contains a clear dispatch table.',
-                        'debug_info': f'Response preview: {response_text[:200]}...'
-                    }, status=400)
+                logger.error(f"Failed to parse extracted JSON: {e}")
+                return JsonResponse({
+                    'error': 'Could not parse response from image analysis. Please try again or check if the image is clear.',
+                    'debug_info': f'Response preview: {response_text[:200]}...'
+                }, status=400)
             
             if not isinstance(extracted_data, list):
                 logger.error(f"Response is not a list: {type(extracted_data)}")
@@ -197,8 +208,8 @@ def process_dispatch_image(request):
             # Validate and process the extracted data
             processed_data = validate_and_process_data(extracted_data)
             
-            # Store in session for confirmation step
-            request.session['extracted_dispatch_data'] = processed_data
+            # Store for the confirmation step
+            store_dispatch_data(request, processed_data)
             
             return JsonResponse({
                 'success': True,
@@ -217,6 +228,49 @@ def process_dispatch_image(request):
         logger.error(f"Error in process_dispatch_image: {e}")
         return JsonResponse({'error': f'Processing failed: {str(e)}'}, status=500)
 
+def downscale_image(image_data, content_type):
+    """Shrink images whose longest edge exceeds MAX_IMAGE_EDGE, returning (bytes, media_type)"""
+    try:
+        img = Image.open(BytesIO(image_data))
+        if max(img.size) <= MAX_IMAGE_EDGE:
+            return image_data, content_type
+        
+        # Apply EXIF rotation before it is dropped by re-encoding
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((MAX_IMAGE_EDGE, MAX_IMAGE_EDGE), Image.LANCZOS)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        
+        output = BytesIO()
+        img.save(output, format='JPEG', quality=85)
+        return output.getvalue(), 'image/jpeg'
+    except Exception as e:
+        logger.warning(f"Could not downscale dispatch image, sending original: {e}")
+        return image_data, content_type
+
+def dispatch_data_cache_key(data_id):
+    """Cache key for extracted dispatch data"""
+    return f'dispatch:{data_id}'
+
+def store_dispatch_data(request, processed_data):
+    """Cache extracted dispatch data and remember its id in the session"""
+    data_id = uuid.uuid4().hex
+    cache.set(dispatch_data_cache_key(data_id), processed_data, DISPATCH_DATA_CACHE_TIMEOUT)
+    request.session[DISPATCH_DATA_SESSION_KEY] = data_id
+
+def load_dispatch_data(request):
+    """Return the dispatch data referenced by the session, or None if missing/expired"""
+    data_id = request.session.get(DISPATCH_DATA_SESSION_KEY)
+    if not data_id:
+        return None
+    return cache.get(dispatch_data_cache_key(data_id))
+
+def clear_dispatch_data(request):
+    """Remove the dispatch data and its session reference"""
+    data_id = request.session.pop(DISPATCH_DATA_SESSION_KEY, None)
+    if data_id:
+        cache.delete(dispatch_data_cache_key(data_id))
+
 def validate_and_process_data(raw_data):
     """Validate extracted data against database and prepare for confirmation"""
     processed_rows = []
@@ -232,11 +286,24 @@ def validate_and_process_data(raw_data):
         }
     }
     
-    # Get existing entities for validation
-    existing_depots = {depot.name.lower(): depot for depot in Depot.objects.filter(is_active=True)}
-    existing_vehicles = {vehicle.truck_number.upper(): vehicle for vehicle in Vehicle.objects.filter(is_active=True)}
-    existing_products = {product.name.lower(): product for product in Product.objects.filter(is_active=True)}
-    existing_dealers = {dealer.name.lower(): dealer for dealer in Dealer.objects.filter(is_active=True)}
+    # Get existing entities for validation (only the id and display name are needed)
+    existing_depots = {
+        name.lower(): {'id': depot_id, 'name': name}
+        for depot_id, name in Depot.objects.filter(is_active=True).values_list('id', 'name')
+    }
+    existing_vehicles = {
+        truck_number.upper(): {'id': vehicle_id, 'truck_number': truck_number}
+        for vehicle_id, truck_number in Vehicle.objects.filter(is_active=True).values_list('id', 'truck_number')
+    }
+    existing_products = {
+        name.lower(): {'id': product_id, 'name': name}
+        for product_id, name in Product.objects.filter(is_active=True).values_list('id', 'name')
+    }
+    existing_dealers = {
+        name_lower: {'id': dealer_id, 'name': name}
+        for dealer_id, name, name_lower in Dealer.objects.filter(is_active=True).values_list('id', 'name', 'name_lower')
+    }
+    product_token_index = build_product_token_index(existing_products)
     
     for i, row in enumerate(raw_data):
         processed_row = {
@@ -257,10 +324,7 @@ def validate_and_process_data(raw_data):
         # Validate depot
         depot_key = processed_row['depot_name'].lower()
         if depot_key in existing_depots:
-            processed_row['entities_found']['depot'] = {
-                'id': existing_depots[depot_key].id,
-                'name': existing_depots[depot_key].name
-            }
+            processed_row['entities_found']['depot'] = dict(existing_depots[depot_key])
         else:
             if processed_row['depot_name'] not in validation_summary['missing_entities']['depots']:
                 validation_summary['missing_entities']['depots'].append(processed_row['depot_name'])
@@ -270,10 +334,7 @@ def validate_and_process_data(raw_data):
         # Validate vehicle
         truck_key = processed_row['truck_number'].upper()
         if truck_key in existing_vehicles:
-            processed_row['entities_found']['vehicle'] = {
-                'id': existing_vehicles[truck_key].id,
-                'truck_number': existing_vehicles[truck_key].truck_number
-            }
+            processed_row['entities_found']['vehicle'] = dict(existing_vehicles[truck_key])
         else:
             if processed_row['truck_number'] not in validation_summary['missing_entities']['vehicles']:
                 validation_summary['missing_entities']['vehicles'].append(processed_row['truck_number'])
@@ -286,21 +347,14 @@ def validate_and_process_data(raw_data):
         
         # First try exact match
         if product_key in existing_products:
-            processed_row['entities_found']['product'] = {
-                'id': existing_products[product_key].id,
-                'name': existing_products[product_key].name
-            }
+            processed_row['entities_found']['product'] = dict(existing_products[product_key])
             product_found = True
         else:
             # Try fuzzy matching
-            for existing_product_key, product in existing_products.items():
-                if existing_product_key in product_key or product_key in existing_product_key:
-                    processed_row['entities_found']['product'] = {
-                        'id': product.id,
-                        'name': product.name
-                    }
-                    product_found = True
-                    break
+            product = match_product_fuzzy(product_key, existing_products, product_token_index)
+            if product:
+                processed_row['entities_found']['product'] = dict(product)
+                product_found = True
         
         if not product_found:
             if processed_row['product_name'] not in validation_summary['missing_entities']['products']:
@@ -314,10 +368,7 @@ def validate_and_process_data(raw_data):
             # Get or prepare Anonymous dealer
             anonymous_dealer = existing_dealers.get('anonymous')
             if anonymous_dealer:
-                processed_row['entities_found']['dealer'] = {
-                    'id': anonymous_dealer.id,
-                    'name': anonymous_dealer.name
-                }
+                processed_row['entities_found']['dealer'] = dict(anonymous_dealer)
             else:
                 if 'Anonymous' not in validation_summary['missing_entities']['dealers']:
                     validation_summary['missing_entities']['dealers'].append('Anonymous')
@@ -325,10 +376,7 @@ def validate_and_process_data(raw_data):
                 processed_row['warnings'].append('Anonymous dealer will be created')
         else:
             if dealer_key in existing_dealers:
-                processed_row['entities_found']['dealer'] = {
-                    'id': existing_dealers[dealer_key].id,
-                    'name': existing_dealers[dealer_key].name
-                }
+                processed_row['entities_found']['dealer'] = dict(existing_dealers[dealer_key])
             else:
                 if processed_row['dealer_name'] not in validation_summary['missing_entities']['dealers']:
                     validation_summary['missing_entities']['dealers'].append(processed_row['dealer_name'])
@@ -358,6 +406,35 @@ def validate_and_process_data(raw_data):
         'missing_entities': validation_summary['missing_entities']
     }
 
+def build_product_token_index(existing_products):
+    """Map each whitespace token of the product names to the (position, name key) pairs containing it"""
+    product_token_index = defaultdict(set)
+    for position, existing_product_key in enumerate(existing_products):
+        for token in existing_product_key.split():
+            product_token_index[token].add((position, existing_product_key))
+    return product_token_index
+
+def match_product_fuzzy(product_key, existing_products, product_token_index):
+    """Find an existing product whose name contains, or is contained in, product_key.
+
+    Products holding every token of product_key are tried first, earliest first,
+    so a name that contains the whole key wins over an earlier, shorter name
+    that is merely contained in the key. Only when none of them contains the
+    key does this fall back to scanning every product in order.
+    """
+    postings = [product_token_index.get(token, set()) for token in product_key.split()]
+    candidates = set.intersection(*postings) if postings else set()
+    for _, existing_product_key in sorted(candidates):
+        if product_key in existing_product_key:
+            return existing_products[existing_product_key]
+    
+    # Names contained in the key, or matching inside a single token
+    # (e.g. "powermax" in "powermax-lpp"), share no complete token set
+    for existing_product_key, product in existing_products.items():
+        if existing_product_key in product_key or product_key in existing_product_key:
+            return product
+    return None
+
 def clean_truck_number(truck_number):
     """Clean and format truck number"""
     if not truck_number:
@@ -378,20 +455,13 @@ def parse_quantity(quantity_str):
         return 0
     
     # Extract numeric part
-    import re
-    numeric_match = re.search(r'(\d+\.?\d*)', str(quantity_str))
-    if numeric_match:
-        try:
-            return float(numeric_match.group(1))
-        except ValueError:
-            return 0
-    
-    return 0
+    numeric_match = _QTY_RE.search(str(quantity_str))
+    return float(numeric_match.group(1)) if numeric_match else 0
 
 @login_required
 def confirm_dispatch_data(request):
     """Display confirmation page with validation results"""
-    extracted_data = request.session.get('extracted_dispatch_data')
+    extracted_data = load_dispatch_data(request)
     
     if not extracted_data:
         messages.error(request, 'No dispatch data found. Please upload an image first.')
@@ -418,7 +488,7 @@ def create_dispatch_orders(request):
     if request.method != 'POST':
         return redirect('dispatch_table_upload')
     
-    extracted_data = request.session.get('extracted_dispatch_data')
+    extracted_data = load_dispatch_data(request)
     if not extracted_data:
         messages.error(request, 'No dispatch data found. Please start over.')
         return redirect('dispatch_table_upload')
@@ -432,6 +502,9 @@ def create_dispatch_orders(request):
             created_entities = create_missing_entities(extracted_data['missing_entities'], extracted_data)
             creation_log.extend(created_entities['log'])
             
+            # Fetch existing entities once instead of per row
+            existing_entities = load_existing_entities(extracted_data['rows'])
+            
             # Create orders
             for row in extracted_data['rows']:
                 if row['validation_status'] != 'valid':
@@ -439,10 +512,12 @@ def create_dispatch_orders(request):
                 
                 try:
                     # Get or create entities
-                    depot = get_or_create_depot(row, created_entities)
-                    vehicle = get_or_create_vehicle(row, created_entities)
-                    product = get_or_create_product(row, created_entities)
-                    dealer = get_or_create_dealer(row, created_entities)
+                    depot = get_or_create_depot(row, created_entities, existing_entities)
+                    vehicle = get_or_create_vehicle(row, created_entities, existing_entities)
+                    product = get_or_create_product(row, created_entities, existing_entities)
+                    dealer = get_or_create_dealer(row, created_entities, existing_entities)
+                    if not all((depot, vehicle, product, dealer)):
+                        raise ValueError("a depot, vehicle, product or dealer for this row could not be created")
                     
                     # Parse order date
                     order_date = datetime.strptime(row['order_date'], '%Y-%m-%d')
@@ -472,9 +547,8 @@ def create_dispatch_orders(request):
                     logger.error(f"Error creating order for row {row['row_number']}: {e}")
                     creation_log.append(f"Failed to create order for row {row['row_number']}: {str(e)}")
             
-            # Clear session data
-            if 'extracted_dispatch_data' in request.session:
-                del request.session['extracted_dispatch_data']
+            # Clear stored dispatch data
+            clear_dispatch_data(request)
             
             messages.success(request, f'Successfully created {len(created_orders)} orders from dispatch table.')
             
@@ -492,6 +566,58 @@ def create_dispatch_orders(request):
         messages.error(request, f'Error creating orders: {str(e)}')
         return redirect('confirm_dispatch_data')
 
+def unique_entity_code(base_code, max_length, taken_codes):
+    """Return base_code, or base_code trimmed and suffixed with a number, so it is not in taken_codes"""
+    code = base_code[:max_length]
+    suffix = 1
+    while code in taken_codes:
+        suffix += 1
+        code = f"{base_code[:max_length - len(str(suffix))]}{suffix}"
+    taken_codes.add(code)
+    return code
+
+def assign_entity_codes(model, names, make_code):
+    """Map each new entity name to a code unused by existing rows and by the other new names"""
+    max_length = model._meta.get_field('code').max_length
+    taken_codes = set(model.objects.values_list('code', flat=True))
+    return {
+        name: unique_entity_code(make_code(name), max_length, taken_codes)
+        for name in names
+    }
+
+def bulk_create_entities(model, objs, lookup_fields):
+    """Insert objs in bulk, skipping unique conflicts.
+
+    Returns the matching stored rows keyed by lookup_fields, and the primary keys of
+    those that already existed, i.e. were not inserted by this call.
+    """
+    # bulk_create bypasses TenantBaseModel.save(), so assign the organization here
+    organization = get_current_organization()
+    if organization is None:
+        raise ValueError(
+            f"Cannot create {model.__name__} without organization context. "
+            "Ensure user is authenticated and has a valid organization."
+        )
+    for obj in objs:
+        obj.organization = organization
+    
+    # Matching on every lookup field keeps a row that lost a conflict from
+    # resolving to another entity
+    lookup_filter = {
+        f'{field}__in': [getattr(obj, field) for obj in objs]
+        for field in lookup_fields
+    }
+    existing_pks = set(model.objects.filter(**lookup_filter).values_list('pk', flat=True))
+    
+    model.objects.bulk_create(objs, ignore_conflicts=True, batch_size=200)
+    
+    # ignore_conflicts does not return primary keys, so re-select the rows
+    stored = {
+        tuple(getattr(obj, field) for field in lookup_fields): obj
+        for obj in model.objects.filter(**lookup_filter)
+    }
+    return stored, existing_pks
+
 def create_missing_entities(missing_entities, processed_data):
     """Create missing depots, vehicles, products, and dealers"""
     created_entities = {
@@ -503,94 +629,141 @@ def create_missing_entities(missing_entities, processed_data):
     }
     
     # Create depots
-    for depot_name in missing_entities['depots']:
-        depot_code = depot_name[:10].upper().replace(' ', '')
-        depot = Depot.objects.create(
-            name=depot_name,
-            code=depot_code,
-            city='Unknown',
-            state='Unknown'
-        )
-        created_entities['depots'][depot_name.lower()] = depot
-        created_entities['log'].append(f"Created depot: {depot_name}")
-    
-    # Create vehicles
-    for truck_number in missing_entities['vehicles']:
-        # Find the vehicle owner name from the processed data
-        owner_name = 'Unknown'
-        for row in processed_data.get('rows', []):
-            if row.get('truck_number', '').upper() == truck_number.upper():
-                owner_name = row.get('vehicle_owner', 'Unknown')
-                break
-        
-        vehicle = Vehicle.objects.create(
-            truck_number=truck_number,
-            owner_name=owner_name,
-            vehicle_type='TRUCK'
-        )
-        created_entities['vehicles'][truck_number.upper()] = vehicle
-        created_entities['log'].append(f"Created vehicle: {truck_number} (Owner: {owner_name})")
+    depot_codes = assign_entity_codes(
+        Depot, missing_entities['depots'], lambda name: name.upper().replace(' ', '')
+    )
+    stored_depots, existing_depot_pks = bulk_create_entities(Depot, [
+        Depot(name=depot_name, code=depot_code, city='Unknown', state='Unknown')
+        for depot_name, depot_code in depot_codes.items()
+    ], ('code', 'name'))
+    for depot_name, depot_code in depot_codes.items():
+        depot = stored_depots.get((depot_code, depot_name))
+        if depot:
+            created_entities['depots'][depot_name.lower()] = depot
+            if depot.pk in existing_depot_pks:
+                created_entities['log'].append(f"Reused existing depot: {depot_name} (Code: {depot_code})")
+            else:
+                created_entities['log'].append(f"Created depot: {depot_name} (Code: {depot_code})")
+        else:
+            created_entities['log'].append(f"Could not create depot: {depot_name} (code {depot_code} is taken)")
+    
+    # Create vehicles, taking each owner name from the first row with that truck
+    owner_by_truck = {}
+    for row in processed_data.get('rows', []):
+        owner_by_truck.setdefault(row.get('truck_number', '').upper(), row.get('vehicle_owner', 'Unknown'))
+    
+    vehicle_owners = {
+        truck_number: owner_by_truck.get(truck_number.upper(), 'Unknown')
+        for truck_number in missing_entities['vehicles']
+    }
+    
+    stored_vehicles, existing_vehicle_pks = bulk_create_entities(Vehicle, [
+        Vehicle(truck_number=truck_number, owner_name=owner_name, vehicle_type='TRUCK')
+        for truck_number, owner_name in vehicle_owners.items()
+    ], ('truck_number',))
+    for truck_number, owner_name in vehicle_owners.items():
+        vehicle = stored_vehicles.get((truck_number,))
+        if vehicle:
+            created_entities['vehicles'][truck_number.upper()] = vehicle
+            if vehicle.pk in existing_vehicle_pks:
+                # Validation only matches active vehicles, so this truck is usually deactivated
+                status = 'active' if vehicle.is_active else 'inactive'
+                created_entities['log'].append(f"Reused existing vehicle: {truck_number} ({status})")
+            else:
+                created_entities['log'].append(f"Created vehicle: {truck_number} (Owner: {owner_name})")
     
     # Create products
-    for product_name in missing_entities['products']:
-        product_code = product_name[:20].upper().replace(' ', '')
-        product = Product.objects.create(
-            name=product_name,
-            code=product_code,
-            unit='MT'
-        )
-        created_entities['products'][product_name.lower()] = product
-        created_entities['log'].append(f"Created product: {product_name}")
+    product_codes = assign_entity_codes(
+        Product, missing_entities['products'], lambda name: name.upper().replace(' ', '')
+    )
+    stored_products, existing_product_pks = bulk_create_entities(Product, [
+        Product(name=product_name, code=product_code, unit='MT')
+        for product_name, product_code in product_codes.items()
+    ], ('code', 'name'))
+    for product_name, product_code in product_codes.items():
+        product = stored_products.get((product_code, product_name))
+        if product:
+            created_entities['products'][product_name.lower()] = product
+            if product.pk in existing_product_pks:
+                created_entities['log'].append(f"Reused existing product: {product_name} (Code: {product_code})")
+            else:
+                created_entities['log'].append(f"Created product: {product_name} (Code: {product_code})")
+        else:
+            created_entities['log'].append(f"Could not create product: {product_name} (code {product_code} is taken)")
     
     # Create dealers
-    for dealer_name in missing_entities['dealers']:
-        if dealer_name.lower() == 'anonymous':
-            dealer_code = 'ANON'
+    dealer_codes = assign_entity_codes(
+        Dealer,
+        missing_entities['dealers'],
+        lambda name: 'ANON' if name.lower() == 'anonymous' else name.upper().replace(' ', '')
+    )
+    stored_dealers, existing_dealer_pks = bulk_create_entities(Dealer, [
+        Dealer(name=dealer_name, code=dealer_code, phone='0000000000')
+        for dealer_name, dealer_code in dealer_codes.items()
+    ], ('code', 'name'))
+    for dealer_name, dealer_code in dealer_codes.items():
+        dealer = stored_dealers.get((dealer_code, dealer_name))
+        if dealer:
+            created_entities['dealers'][dealer_name.lower()] = dealer
+            if dealer.pk in existing_dealer_pks:
+                created_entities['log'].append(f"Reused existing dealer: {dealer_name} (Code: {dealer_code})")
+            else:
+                created_entities['log'].append(f"Created dealer: {dealer_name} (Code: {dealer_code})")
         else:
-            dealer_code = dealer_name[:20].upper().replace(' ', '')
-        
-        dealer = Dealer.objects.create(
-            name=dealer_name,
-            code=dealer_code,
-            phone='0000000000'
-        )
-        created_entities['dealers'][dealer_name.lower()] = dealer
-        created_entities['log'].append(f"Created dealer: {dealer_name}")
+            created_entities['log'].append(f"Could not create dealer: {dealer_name} (code {dealer_code} is taken)")
     
     return created_entities
 
-def get_or_create_depot(row, created_entities):
+def load_existing_entities(rows):
+    """Fetch all existing entities referenced by the rows, one query per entity type"""
+    entity_models = {
+        'depot': Depot,
+        'vehicle': Vehicle,
+        'product': Product,
+        'dealer': Dealer,
+    }
+    existing_entities = {}
+    for entity, model in entity_models.items():
+        entity_ids = {
+            row['entities_found'][entity]['id']
+            for row in rows
+            if entity in row['entities_found']
+        }
+        existing_entities[f'{entity}s'] = model.objects.in_bulk(entity_ids)
+    return existing_entities
+
+def get_or_create_depot(row, created_entities, existing_entities):
     """Get existing depot or return newly created one"""
     if 'depot' in row['entities_found']:
-        # Return the actual model instance
-        return Depot.objects.get(id=row['entities_found']['depot']['id'])
+        # Return the prefetched model instance
+        return existing_entities['depots'][row['entities_found']['depot']['id']]
     
     depot_key = row['depot_name'].lower()
     return created_entities['depots'].get(depot_key)
 
-def get_or_create_vehicle(row, created_entities):
+def get_or_create_vehicle(row, created_entities, existing_entities):
     """Get existing vehicle or return newly created one"""
     if 'vehicle' in row['entities_found']:
-        # Return the actual model instance
-        return Vehicle.objects.get(id=row['entities_found']['vehicle']['id'])
+        # Return the prefetched model instance
+        return existing_entities['vehicles'][row['entities_found']['vehicle']['id']]
     
     truck_key = row['truck_number'].upper()
     return created_entities['vehicles'].get(truck_key)
 
-def get_or_create_product(row, created_entities):
+def get_or_create_product(row, created_entities, existing_entities):
     """Get existing product or return newly created one"""
     if 'product' in row['entities_found']:
-        # Return the actual model instance
-        return Product.objects.get(id=row['entities_found']['product']['id'])
+        # Return the prefetched model instance
+        return existing_entities['products'][row['entities_found']['product']['id']]
     
     product_key = row['product_name'].lower()
     return created_entities['products'].get(product_key)
 
-def get_or_create_dealer(row, created_entities):
+def get_or_create_dealer(row, created_entities, existing_entities):
     """Get existing dealer or return newly created one"""
     if 'dealer' in row['entities_found']:
-        # Return the actual model instance
-        return Dealer.objects.get(id=row['entities_found']['dealer']['id'])
+        # Return the prefetched model instance
+        return existing_entities['dealers'][row['entities_found']['dealer']['id']]
     
     dealer_key = row['dealer_name'].lower()
     return created_entities['dealers'].get(dealer_key)
\ No newline at end of file
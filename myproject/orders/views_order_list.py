@@ -1,25 +1,69 @@
 from django.shortcuts import render
-from django.core.paginator import Paginator
+from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
 from django.db.models import Q, Count
+from django.utils.dateparse import parse_datetime
 from datetime import date
 from sylvia.models import Order, Dealer
 
+ORDERS_PER_PAGE = 20
+ORDER_STATS_CACHE_TIMEOUT = 60  # seconds
+
+
+def order_stats_cache_key(organization_id):
+    """Cache key for the order list status counts of one organization"""
+    return f'order_stats_v1:{organization_id}'
+
+
+def parse_order_cursor(cursor):
+    """Parse an `<order_date>_<id>` keyset cursor, returning None if malformed"""
+    order_date, _, order_id = cursor.rpartition('_')
+    try:
+        order_date = parse_datetime(order_date)
+        order_id = int(order_id)
+    except (ValueError, TypeError):
+        return None
+    if order_date is None:
+        return None
+    return order_date, order_id
+
+
+@login_required
 def order_list(request):
     # Get all orders first for statistics calculation
     all_orders = Order.objects.all()
     
-    # Calculate order statistics by status
-    today = date.today()
-    order_stats = all_orders.aggregate(
-        total_orders=Count('id'),
-        pending_orders=Count('id', filter=Q(status='PENDING')),
-        anonymous_dealers_count=Count('dealer_id', filter=Q(dealer__name__iexact='anonymous')),
-        mrn_created_orders=Count('id', filter=Q(mrn_date=today)),
-        billed_orders=Count('id', filter=Q(status='BILLED'))
+    # Calculate order statistics by status (cached, invalidated by Order signals)
+    def compute_order_stats():
+        today = date.today()
+        return all_orders.aggregate(
+            total_orders=Count('id'),
+            pending_orders=Count('id', filter=Q(status='PENDING')),
+            anonymous_dealers_count=Count('dealer_id', filter=Q(dealer__name_lower='anonymous')),
+            mrn_created_orders=Count('id', filter=Q(mrn_date=today)),
+            billed_orders=Count('id', filter=Q(status='BILLED'))
+        )
+    
+    organization = getattr(request, 'organization', None)
+    order_stats = cache.get_or_set(
+        order_stats_cache_key(organization.id if organization else None),
+        compute_order_stats,
+        timeout=ORDER_STATS_CACHE_TIMEOUT
     )
     
     # Start with all orders for filtering
-    orders = all_orders.order_by('-order_date')
+    # Join/prefetch everything the template reads per row and skip unused columns
+    orders = (
+        all_orders
+        .select_related('dealer', 'vehicle', 'depot')
+        .prefetch_related('order_items__product')
+        .annotate(mrn_image_count=Count('mrn_images'))
+        .only(
+            'id', 'order_date', 'mrn_date', 'bill_date', 'status', 'remarks',
+            'dealer__name', 'vehicle__truck_number', 'depot__name',
+        )
+        .order_by('-order_date', '-id')
+    )
     
     # Search and filtering
     search_query = request.GET.get('search', '')
@@ -30,8 +74,7 @@ def order_list(request):
     if dealer_filter:
         try:
             dealer_id = int(dealer_filter)
-            if Dealer.objects.filter(id=dealer_id, is_active=True).exists():
-                orders = orders.filter(dealer_id=dealer_id)
+            orders = orders.filter(dealer_id=dealer_id, dealer__is_active=True)
         except (ValueError, TypeError):
             pass
     
@@ -54,15 +97,29 @@ def order_list(request):
     # Order status choices for the dropdown
     order_status_choices = Order.ORDER_STATUS_CHOICES
     
-    # Pagination
-    paginator = Paginator(orders, 20)  # Show 20 orders per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination on (order_date, id) avoids COUNT(*) and deep OFFSET scans
+    cursor = parse_order_cursor(request.GET.get('after', ''))
+    if cursor:
+        cursor_date, cursor_id = cursor
+        orders = orders.filter(
+            Q(order_date__lt=cursor_date) |
+            Q(order_date=cursor_date, id__lt=cursor_id)
+        )
+    
+    page_orders = list(orders[:ORDERS_PER_PAGE + 1])
+    has_next = len(page_orders) > ORDERS_PER_PAGE
+    page_orders = page_orders[:ORDERS_PER_PAGE]
+    next_cursor = ''
+    if has_next:
+        last_order = page_orders[-1]
+        next_cursor = f"{last_order.order_date.isoformat()}_{last_order.id}"
     
     return render(request, 'orders/order_list.html', {
-        'orders': page_obj,
-        'page_obj': page_obj,
-        'is_paginated': page_obj.has_other_pages(),
+        'orders': page_orders,
+        'is_paginated': has_next or cursor is not None,
+        'has_previous': cursor is not None,
+        'has_next': has_next,
+        'next_cursor': next_cursor,
         'order_stats': order_stats,
         'dealers': dealers,
         'order_status_choices': order_status_choices,
@@ -9,16 +9,29 @@ Usage:
     python3 setup_audit_cron.py
 """
 
+import re
 import sys
+import fcntl
+import tempfile
 import subprocess
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 
 
+LOCK_PATH = Path(tempfile.gettempdir()) / "sylvia_audit_cron.lock"
+
+# Matches an active (uncommented) crontab line that runs check_audit_reminder
+AUDIT_CRON_RE = re.compile(r'(?m)^[^#\n]*\bcheck_audit_reminder\b')
+
+
+@lru_cache(maxsize=1)
 def get_project_path():
     """Get the absolute path to the Django project"""
     return Path(__file__).parent.absolute()
 
 
+@lru_cache(maxsize=1)
 def create_cron_entry():
     """Create a cron entry for daily audit reminder checks"""
     project_path = get_project_path()
@@ -30,27 +43,40 @@ def create_cron_entry():
     return cron_command
 
 
+@contextmanager
+def crontab_lock():
+    """Hold an exclusive lock so concurrent runs can't overwrite each other's crontab edits"""
+    with open(LOCK_PATH, 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
 def setup_cron():
     """Set up the cron job for audit reminders"""
     try:
-        # Get current crontab
-        result = subprocess.run(['crontab', '-l'], capture_output=True, text=True)
-        current_crontab = result.stdout if result.returncode == 0 else ""
-        
         # Create new cron entry
         cron_entry = create_cron_entry()
         
-        # Check if our cron job already exists
-        if 'check_audit_reminder' in current_crontab:
-            print("✅ Audit reminder cron job already exists!")
-            print(f"Current entry: {cron_entry}")
-            return True
-        
-        # Add our cron job
-        new_crontab = current_crontab.rstrip() + '\n' + cron_entry + '\n'
-        
-        # Write new crontab
-        process = subprocess.run(['crontab', '-'], input=new_crontab, text=True)
+        # Read-modify-write of the crontab under the lock
+        with crontab_lock():
+            # Get current crontab
+            result = subprocess.run(['crontab', '-l'], capture_output=True, text=True)
+            current_crontab = result.stdout if result.returncode == 0 else ""
+            
+            # Check if our cron job already exists
+            if AUDIT_CRON_RE.search(current_crontab):
+                print("✅ Audit reminder cron job already exists!")
+                print(f"Current entry: {cron_entry}")
+                return True
+            
+            # Add our cron job
+            new_crontab = current_crontab.rstrip() + '\n' + cron_entry + '\n'
+            
+            # Write new crontab
+            process = subprocess.run(['crontab', '-'], input=new_crontab, text=True)
         
         if process.returncode == 0:
             print("✅ Successfully added audit reminder cron job!")
@@ -1,16 +1,22 @@
 from django.contrib import admin
-from django.utils.html import format_html
-from django.urls import reverse
-from django.utils.safestring import mark_safe
+from django.db.models import Sum
 from .models import (
     Depot, Product, Dealer, Vehicle, Order, OrderItem, 
     MRN, AuditLog, AppSettings, NotificationTemplate, DealerContext, OrderMRNImage,
     Organization, UserProfile
 )
 
+
+def is_changelist_request(request):
+    """True when the admin is rendering a model's changelist page"""
+    match = request.resolver_match
+    return match is not None and match.url_name.endswith('_changelist')
+
+
 @admin.register(Depot)
 class DepotAdmin(admin.ModelAdmin):
     list_display = ['name', 'code', 'city', 'state', 'is_active', 'created_at','organization']
+    list_select_related = ['organization']
     list_filter = ['is_active', 'state', 'created_at']
     search_fields = ['name', 'code', 'city']
     ordering = ['name']
@@ -18,6 +24,7 @@ class DepotAdmin(admin.ModelAdmin):
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ['name', 'code', 'unit', 'is_active', 'created_at','organization']
+    list_select_related = ['organization']
     list_filter = ['is_active', 'unit', 'created_at']
     search_fields = ['name', 'code']
     ordering = ['name']
@@ -25,9 +32,18 @@ class ProductAdmin(admin.ModelAdmin):
 @admin.register(Dealer)
 class DealerAdmin(admin.ModelAdmin):
     list_display = ['name', 'code', 'phone', 'city', 'credit_limit', 'is_active','organization']
+    list_select_related = ['organization']
     list_filter = ['is_active', 'city', 'state', 'created_at']
     search_fields = ['name', 'code', 'phone', 'contact_person']
     ordering = ['name']
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if is_changelist_request(request):
+            queryset = queryset.only(
+                'name', 'code', 'phone', 'city', 'credit_limit', 'is_active', 'organization__name'
+            )
+        return queryset
     
     fieldsets = (
         ('Basic Information', {
@@ -47,6 +63,7 @@ class DealerAdmin(admin.ModelAdmin):
 @admin.register(Vehicle)
 class VehicleAdmin(admin.ModelAdmin):
     list_display = ['truck_number', 'owner_name', 'driver_name', 'capacity', 'vehicle_type', 'is_active','organization']
+    list_select_related = ['organization']
     list_filter = ['vehicle_type', 'is_active', 'created_at']
     search_fields = ['truck_number', 'owner_name', 'driver_name']
     ordering = ['truck_number']
@@ -56,14 +73,22 @@ class OrderItemInline(admin.TabularInline):
     extra = 1
     fields = ['product', 'quantity', 'unit_price']
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'product':
+            kwargs['queryset'] = Product.objects.only('id', 'name', 'code')
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ['order_number', 'dealer', 'vehicle', 'depot', 'status', 'order_date', 'total_quantity', 'whatsapp_sent','organization']
+    list_select_related = ['dealer', 'vehicle', 'depot', 'organization']
     list_filter = ['status', 'depot', 'order_date', 'whatsapp_sent']
     search_fields = ['order_number', 'dealer__name', 'vehicle__truck_number']
     ordering = ['-order_date']
     readonly_fields = ['order_number', 'created_at', 'updated_at']
     inlines = [OrderItemInline]
+    show_full_result_count = False
+    autocomplete_fields = ['dealer', 'vehicle', 'depot']
     
     fieldsets = (
         ('Order Information', {
@@ -81,17 +106,40 @@ class OrderAdmin(admin.ModelAdmin):
         }),
     )
     
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in ('dealer', 'depot'):
+            kwargs['queryset'] = db_field.related_model.objects.only('id', 'name', 'code')
+        elif db_field.name == 'vehicle':
+            kwargs['queryset'] = Vehicle.objects.only('id', 'truck_number')
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request).select_related(*self.list_select_related).annotate(
+            _total_qty=Sum('order_items__quantity')
+        )
+        if is_changelist_request(request):
+            queryset = queryset.only(
+                'order_number', 'status', 'order_date', 'whatsapp_sent',
+                'dealer__name', 'dealer__code', 'vehicle__truck_number',
+                'depot__name', 'depot__code', 'organization__name'
+            )
+        return queryset
+
     def total_quantity(self, obj):
-        return f"{obj.get_total_quantity()} MT"
+        return f"{obj._total_qty or 0} MT"
     total_quantity.short_description = "Total Qty"
+    total_quantity.admin_order_field = '_total_qty'
 
 @admin.register(MRN)
 class MRNAdmin(admin.ModelAdmin):
     list_display = ['mrn_number', 'order', 'mrn_date', 'status', 'quality_checked','organization']
+    list_select_related = ['order', 'order__dealer', 'organization']
     list_filter = ['status', 'quality_checked', 'mrn_date']
     search_fields = ['mrn_number', 'order__order_number', 'order__dealer__name']
     ordering = ['-mrn_date']
     readonly_fields = ['mrn_number']
+    autocomplete_fields = ['order']
+    show_full_result_count = False
     
     fieldsets = (
         ('MRN Information', {
@@ -106,10 +154,32 @@ class MRNAdmin(admin.ModelAdmin):
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
     list_display = ['action', 'model_name', 'object_id', 'user', 'created_at','organization']
+    list_select_related = ['user', 'organization']
     list_filter = ['action', 'model_name', 'created_at']
     search_fields = ['object_id', 'user__username']
     ordering = ['-created_at']
     readonly_fields = ['created_at']
+    show_full_result_count = False
+    list_per_page = 50
+    date_hierarchy = 'created_at'
+
+    # Audit entries are written by the application and never edited by hand
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if is_changelist_request(request):
+            queryset = queryset.only(
+                'action', 'model_name', 'object_id', 'created_at', 'user__username', 'organization__name'
+            )
+        return queryset
 
 @admin.register(AppSettings)
 class AppSettingsAdmin(admin.ModelAdmin):
@@ -120,6 +190,7 @@ class AppSettingsAdmin(admin.ModelAdmin):
 @admin.register(NotificationTemplate)
 class NotificationTemplateAdmin(admin.ModelAdmin):
     list_display = ['name', 'type', 'is_active', 'created_at','organization']
+    list_select_related = ['organization']
     list_filter = ['type', 'is_active', 'created_at']
     search_fields = ['name', 'subject']
     ordering = ['name']
@@ -128,13 +199,17 @@ class NotificationTemplateAdmin(admin.ModelAdmin):
 @admin.register(OrderMRNImage)
 class OrderMRNImageAdmin(admin.ModelAdmin):
     list_display = ['order','organization']
+    list_select_related = ['order', 'order__dealer', 'organization']
     search_fields = ['order__order_number']
 
 @admin.register(DealerContext)
 class DealerContextAdmin(admin.ModelAdmin):
     list_display = ['dealer', 'interaction_date', 'created_at','organization']
+    list_select_related = ['dealer', 'organization']
     list_filter = ['interaction_date', 'created_at']
     search_fields = ['dealer__name', 'topics_discussed']
+    autocomplete_fields = ['dealer']
+    show_full_result_count = False
     ordering = ['-interaction_date']
     
 
@@ -174,6 +249,7 @@ class OrganizationAdmin(admin.ModelAdmin):
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'organization']
+    list_select_related = ['user', 'organization']
     list_filter = [ 'organization']
     search_fields = ['user__username', 'user__email']
     ordering = ['user__username']
\ No newline at end of file
@@ -1,5 +1,6 @@
-from django.urls import path, include
-from rest_framework.routers import DefaultRouter
+from django.urls import path
+from django.utils.module_loading import import_string
+from rest_framework.routers import SimpleRouter
 from rest_framework.authtoken.views import obtain_auth_token
 
 from .api_views import (
@@ -10,17 +11,26 @@ from .api_views import (
     order_analytics, user_profile
 )
 
-# Import BI Views
-from .bi_views import (
-    executive_summary, stock_analytics, monthly_trends, 
-    depot_analytics, operations_live
-)
-
 # Import Godown ViewSets
 from godown.api_views import LoadingRequestImageViewSet
 
+def lazy_view(dotted_path):
+    """Import a function view on its first request instead of when the URLconf loads"""
+    view = None
+
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path)
+        return view(request, *args, **kwargs)
+
+    # DRF views are csrf_exempt and enforce CSRF in SessionAuthentication instead
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
 # Create router and register viewsets
-router = DefaultRouter()
+router = SimpleRouter()
 router.register(r'depots', DepotViewSet)
 router.register(r'products', ProductViewSet)
 router.register(r'dealers', DealerViewSet)
@@ -50,12 +60,12 @@ urlpatterns = [
     path('analytics/orders/', order_analytics, name='order_analytics'),
     
     # Business Intelligence APIs
-    path('bi/executive-summary/', executive_summary, name='bi_executive_summary'),
-    path('bi/stock-analytics/', stock_analytics, name='bi_stock_analytics'),
-    path('bi/monthly-trends/', monthly_trends, name='bi_monthly_trends'),
-    path('bi/depot-analytics/', depot_analytics, name='bi_depot_analytics'),
-    path('bi/operations-live/', operations_live, name='bi_operations_live'),
-    
-    # Include all viewset routes
-    path('', include(router.urls)),
-]
\ No newline at end of file
+    path('bi/executive-summary/', lazy_view('sylvia.bi_views.executive_summary'), name='bi_executive_summary'),
+    path('bi/stock-analytics/', lazy_view('sylvia.bi_views.stock_analytics'), name='bi_stock_analytics'),
+    path('bi/monthly-trends/', lazy_view('sylvia.bi_views.monthly_trends'), name='bi_monthly_trends'),
+    path('bi/depot-analytics/', lazy_view('sylvia.bi_views.depot_analytics'), name='bi_depot_analytics'),
+    path('bi/operations-live/', lazy_view('sylvia.bi_views.operations_live'), name='bi_operations_live'),
+]
+
+# Include all viewset routes
+urlpatterns += router.urls
\ No newline at end of file
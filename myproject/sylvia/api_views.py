@@ -1,10 +1,25 @@
+import hashlib
+import json
+from decimal import Decimal
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Sum, Avg, Q
+from rest_framework.generics import get_object_or_404
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Count, Sum, Avg, Q, F, Case, When, Value, BooleanField, DecimalField, OuterRef, Subquery
+)
+from django.db.models.functions import Coalesce, TruncMonth
+from django.core.cache import cache
 from django.utils import timezone
-from datetime import date, timedelta
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date
+from django.utils.http import quote_etag
+from datetime import date, datetime, time, timedelta
+from dateutil.relativedelta import relativedelta
 from django.contrib.auth.models import User
 
 from .models import (
@@ -15,22 +30,96 @@ from .serializers import (
     DepotSerializer, ProductSerializer, DealerSerializer, VehicleSerializer,
     OrderSerializer, OrderCreateSerializer, OrderItemSerializer, MRNSerializer, AuditLogSerializer, AppSettingsSerializer,
     NotificationTemplateSerializer, DashboardStatsSerializer, DealerStatsSerializer,
-    ProductStatsSerializer, UserSerializer, DealerContextSerializer, OrderMRNImageSerializer
+    ProductStatsSerializer, UserSerializer, DealerContextSerializer, OrderMRNImageSerializer,
+    OrderSummarySerializer
 )
 
 
+VALID_ORDER_STATUSES = frozenset(value for value, _ in Order.ORDER_STATUS_CHOICES)
+
+DASHBOARD_STATS_CACHE_TIMEOUT = 30  # seconds
+
+
+def dashboard_stats_cache_key(organization_id):
+    """Cache key for the dashboard counts of one organization"""
+    return f'dashboard_stats_v1:{organization_id}'
+
+
+ANALYTICS_CACHE_TIMEOUT = 300  # seconds
+
+
+def analytics_cache_key(name, organization_id):
+    """Cache key for one full-table analytics payload of one organization"""
+    return f'analytics_v1:{name}:{organization_id}'
+
+
+def day_bounds(day):
+    """Aware [start, end) datetimes of a local calendar day, so range filters can use indexes"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+def paginated_response(viewset, queryset):
+    """Serialize one page of a list action, or the whole queryset when pagination is off"""
+    page = viewset.paginate_queryset(queryset)
+    if page is not None:
+        serializer = viewset.get_serializer(page, many=True)
+        return viewset.get_paginated_response(serializer.data)
+    
+    serializer = viewset.get_serializer(queryset, many=True)
+    return Response(serializer.data)
+
+
+def with_order_relations(queryset):
+    """Eager-load every relation OrderSerializer renders"""
+    return queryset.select_related(
+        'dealer__created_by', 'vehicle__created_by', 'depot__created_by', 'created_by',
+        'mrn__created_by', 'mrn__approved_by'
+    ).prefetch_related('order_items__product__created_by', 'mrn_images__created_by')
+
+
+def order_list_response(viewset, orders):
+    """One page of nested orders, or of flat summary rows built from values() when ?summary=true"""
+    if viewset.request.query_params.get('summary', '').lower() in ('1', 'true'):
+        # A correlated subquery keeps the outer query ungrouped, so the paginator's
+        # COUNT(*) does not have to rebuild the join and GROUP BY
+        item_totals = OrderItem.objects.filter(order=OuterRef('pk')).values('order').annotate(
+            total=Sum('quantity')
+        ).values('total')
+        orders = orders.annotate(
+            total_quantity=Coalesce(Subquery(item_totals), Value(Decimal('0')), output_field=DecimalField())
+        ).values('id', 'order_number', 'status', 'order_date', 'total_quantity').order_by('-order_date')
+        serializer_class = OrderSummarySerializer
+    else:
+        orders = with_order_relations(orders).order_by('-order_date')
+        serializer_class = OrderSerializer
+    
+    context = viewset.get_serializer_context()
+    page = viewset.paginate_queryset(orders)
+    if page is not None:
+        serializer = serializer_class(page, many=True, context=context)
+        return viewset.get_paginated_response(serializer.data)
+    
+    serializer = serializer_class(orders, many=True, context=context)
+    return Response(serializer.data)
+
+
 class DepotViewSet(viewsets.ModelViewSet):
     queryset = Depot.objects.all().order_by('name')
     serializer_class = DepotSerializer
     search_fields = ['name', 'code', 'city', 'state']
     ordering_fields = ['name', 'code', 'created_at']
     
+    def get_queryset(self):
+        return super().get_queryset().select_related('created_by')
+    
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
     @action(detail=False, methods=['get'])
     def active(self, request):
-        active_depots = self.queryset.filter(is_active=True)
+        active_depots = self.get_queryset().filter(is_active=True)
         serializer = self.get_serializer(active_depots, many=True)
         return Response(serializer.data)
 
@@ -41,12 +130,15 @@ class ProductViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'code', 'description']
     ordering_fields = ['name', 'code', 'created_at']
     
+    def get_queryset(self):
+        return super().get_queryset().select_related('created_by')
+    
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
     @action(detail=False, methods=['get'])
     def active(self, request):
-        active_products = self.queryset.filter(is_active=True)
+        active_products = self.get_queryset().filter(is_active=True)
         serializer = self.get_serializer(active_products, many=True)
         return Response(serializer.data)
 
@@ -57,21 +149,22 @@ class DealerViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'code', 'contact_person', 'phone', 'email', 'city']
     ordering_fields = ['name', 'code', 'created_at', 'credit_limit']
     
+    def get_queryset(self):
+        return super().get_queryset().select_related('created_by')
+    
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
     @action(detail=False, methods=['get'])
     def active(self, request):
-        active_dealers = self.queryset.filter(is_active=True)
+        active_dealers = self.get_queryset().filter(is_active=True)
         serializer = self.get_serializer(active_dealers, many=True)
         return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
     def orders(self, request, pk=None):
         dealer = self.get_object()
-        orders = Order.objects.filter(dealer=dealer).order_by('-order_date')
-        serializer = OrderSerializer(orders, many=True)
-        return Response(serializer.data)
+        return order_list_response(self, Order.objects.filter(dealer=dealer))
     
     @action(detail=True, methods=['get'])
     def statistics(self, request, pk=None):
@@ -79,16 +172,15 @@ class DealerViewSet(viewsets.ModelViewSet):
         now = timezone.now()
         orders = Order.objects.filter(dealer=dealer)
         
-        stats = {
-            'total_orders': orders.count(),
-            'weekly_orders': orders.filter(order_date__gte=now-timedelta(days=7)).count(),
-            'monthly_orders': orders.filter(order_date__gte=now-timedelta(days=30)).count(),
-            'pending_orders': orders.filter(status__in=['PENDING', 'CONFIRMED']).count(),
-            'completed_orders': orders.filter(status='DELIVERED').count(),
-            'total_value': orders.aggregate(
-                total=Sum('order_items__quantity') * Sum('order_items__unit_price')
-            )['total'] or 0,
-        }
+        # One query; counts are distinct because the order_items join repeats orders
+        stats = orders.aggregate(
+            total_orders=Count('id', distinct=True),
+            weekly_orders=Count('id', distinct=True, filter=Q(order_date__gte=now-timedelta(days=7))),
+            monthly_orders=Count('id', distinct=True, filter=Q(order_date__gte=now-timedelta(days=30))),
+            pending_orders=Count('id', distinct=True, filter=Q(status__in=['PENDING', 'CONFIRMED'])),
+            completed_orders=Count('id', distinct=True, filter=Q(status='DELIVERED')),
+            total_value=Sum(F('order_items__quantity') * F('order_items__unit_price'), default=0),
+        )
         return Response(stats)
 
 
@@ -98,21 +190,22 @@ class VehicleViewSet(viewsets.ModelViewSet):
     search_fields = ['truck_number', 'owner_name', 'driver_name', 'driver_phone']
     ordering_fields = ['truck_number', 'capacity', 'created_at']
     
+    def get_queryset(self):
+        return super().get_queryset().select_related('created_by')
+    
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
     @action(detail=False, methods=['get'])
     def active(self, request):
-        active_vehicles = self.queryset.filter(is_active=True)
+        active_vehicles = self.get_queryset().filter(is_active=True)
         serializer = self.get_serializer(active_vehicles, many=True)
         return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
     def orders(self, request, pk=None):
         vehicle = self.get_object()
-        orders = Order.objects.filter(vehicle=vehicle).order_by('-order_date')
-        serializer = OrderSerializer(orders, many=True)
-        return Response(serializer.data)
+        return order_list_response(self, Order.objects.filter(vehicle=vehicle))
 
 
 class OrderViewSet(viewsets.ModelViewSet):
@@ -120,6 +213,9 @@ class OrderViewSet(viewsets.ModelViewSet):
     search_fields = ['order_number', 'dealer__name', 'vehicle__truck_number', 'status']
     ordering_fields = ['order_date', 'order_number', 'status']
     
+    def get_queryset(self):
+        return with_order_relations(super().get_queryset())
+    
     def get_serializer_class(self):
         if self.action == 'create':
             return OrderCreateSerializer
@@ -131,28 +227,35 @@ class OrderViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def by_status(self, request):
         status_param = request.query_params.get('status', 'PENDING')
-        orders = self.queryset.filter(status=status_param)
-        serializer = self.get_serializer(orders, many=True)
-        return Response(serializer.data)
+        orders = self.get_queryset().filter(status=status_param)
+        return paginated_response(self, orders)
     
     @action(detail=False, methods=['get'])
     def pending(self, request):
-        pending_orders = self.queryset.filter(status__in=['PENDING', 'CONFIRMED'])
-        serializer = self.get_serializer(pending_orders, many=True)
-        return Response(serializer.data)
+        pending_orders = self.get_queryset().filter(status__in=['PENDING', 'CONFIRMED'])
+        return paginated_response(self, pending_orders)
     
     @action(detail=False, methods=['get'])
     def today(self, request):
-        today_orders = self.queryset.filter(order_date__date=date.today())
-        serializer = self.get_serializer(today_orders, many=True)
-        return Response(serializer.data)
+        start, end = day_bounds(date.today())
+        today_orders = self.get_queryset().filter(order_date__gte=start, order_date__lt=end)
+        return paginated_response(self, today_orders)
     
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
-        order = self.get_object()
         new_status = request.data.get('status')
         
-        if new_status in dict(Order.ORDER_STATUS_CHOICES):
+        with transaction.atomic():
+            # Lock the order row so concurrent status changes can't interleave
+            order = get_object_or_404(self.get_queryset().select_for_update(of=('self',)), pk=pk)
+            self.check_object_permissions(request, order)
+            
+            if new_status not in VALID_ORDER_STATUSES:
+                return Response(
+                    {'error': 'Invalid status'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
             old_status = order.status
             order.status = new_status
             
@@ -166,7 +269,9 @@ class OrderViewSet(viewsets.ModelViewSet):
             elif new_status == 'DELIVERED' and not order.delivery_date:
                 order.delivery_date = timezone.now()
             
-            order.save()
+            order.save(update_fields=[
+                'status', 'mrn_date', 'bill_date', 'dispatch_date', 'delivery_date', 'updated_at'
+            ])
             
             # Create audit log
             AuditLog.objects.create(
@@ -180,14 +285,9 @@ class OrderViewSet(viewsets.ModelViewSet):
                     'order_number': order.order_number
                 }
             )
-            
-            serializer = self.get_serializer(order)
-            return Response(serializer.data)
         
-        return Response(
-            {'error': 'Invalid status'}, 
-            status=status.HTTP_400_BAD_REQUEST
-        )
+        serializer = self.get_serializer(order)
+        return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
     def mrn_images(self, request, pk=None):
@@ -263,10 +363,11 @@ class OrderItemViewSet(viewsets.ModelViewSet):
     serializer_class = OrderItemSerializer
     
     def get_queryset(self):
+        queryset = super().get_queryset().select_related('product__created_by')
         order_id = self.request.query_params.get('order_id')
         if order_id:
-            return self.queryset.filter(order_id=order_id)
-        return self.queryset
+            return queryset.filter(order_id=order_id)
+        return queryset
 
 
 class OrderMRNImageViewSet(viewsets.ModelViewSet):
@@ -277,6 +378,9 @@ class OrderMRNImageViewSet(viewsets.ModelViewSet):
     search_fields = ['order__order_number', 'original_filename', 'image_type']
     ordering_fields = ['upload_timestamp', 'image_type', 'is_primary']
     
+    def get_queryset(self):
+        return super().get_queryset().select_related('order', 'created_by')
+    
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
@@ -322,24 +426,34 @@ class OrderMRNImageViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        images = self.queryset.filter(order_id=order_id)
-        serializer = self.get_serializer(images, many=True)
-        return Response(serializer.data)
+        images = self.get_queryset().filter(order_id=order_id)
+        return paginated_response(self, images)
     
     @action(detail=True, methods=['post'])
     def set_primary(self, request, pk=None):
         """Set image as primary MRN proof for the order"""
         image_record = self.get_object()
+        now = timezone.now()
         
-        # Unset all other primary images for this order
+        # Flip the primary flag across the order's images in one UPDATE,
+        # touching only the rows whose flag actually changes
         OrderMRNImage.objects.filter(
-            order=image_record.order, 
-            is_primary=True
-        ).update(is_primary=False)
-        
-        # Set this image as primary
-        image_record.is_primary = True
-        image_record.save()
+            order_id=image_record.order_id
+        ).filter(
+            Q(pk=image_record.pk, is_primary=False) |
+            (Q(is_primary=True) & ~Q(pk=image_record.pk))
+        ).update(
+            is_primary=Case(
+                When(pk=image_record.pk, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+            updated_at=now,
+        )
+        # The UPDATE skipped this row if it was already primary
+        if not image_record.is_primary:
+            image_record.is_primary = True
+            image_record.updated_at = now
         
         serializer = self.get_serializer(image_record)
         return Response(serializer.data)
@@ -348,16 +462,14 @@ class OrderMRNImageViewSet(viewsets.ModelViewSet):
     def by_type(self, request):
         """Filter images by type"""
         image_type = request.query_params.get('type', 'MRN_PROOF')
-        images = self.queryset.filter(image_type=image_type)
-        serializer = self.get_serializer(images, many=True)
-        return Response(serializer.data)
+        images = self.get_queryset().filter(image_type=image_type)
+        return paginated_response(self, images)
     
     @action(detail=True, methods=['get'])
     def serve_image(self, request, pk=None):
         """Serve image with proper authentication"""
-        from django.http import HttpResponse
+        from django.http import HttpResponseRedirect, StreamingHttpResponse
         from .storage import krutrim_storage
-        import requests
         
         try:
             image_record = self.get_object()
@@ -368,6 +480,22 @@ class OrderMRNImageViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
+            # Redirect to a short-lived signed URL so the image bytes bypass Django,
+            # unless the deployment's clients cannot reach storage directly
+            if settings.KRUTRIM_STORAGE_REDIRECT_IMAGES:
+                presigned_url = krutrim_storage.generate_presigned_url(image_record.storage_key, expiration=3600)
+                if presigned_url:
+                    redirect = HttpResponseRedirect(presigned_url)
+                    redirect['Cache-Control'] = 'private, max-age=3500'  # Expire before the signature does
+                    return redirect
+            
+            # Proxy the image through Django
+            # Stored objects never change in place, so the key and upload time identify the bytes
+            etag = 'W/' + quote_etag(f'{image_record.storage_key}-{int(image_record.upload_timestamp.timestamp())}')
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                return not_modified
+            
             # Construct the image URL
             image_url = f"{krutrim_storage.endpoint_url}/{krutrim_storage.bucket_name}/{image_record.storage_key}"
             
@@ -378,23 +506,34 @@ class OrderMRNImageViewSet(viewsets.ModelViewSet):
                 content_type=''
             )
             
-            # Fetch the image from Krutrim Storage
-            response = requests.get(image_url, headers=headers, timeout=30)
+            # Fetch the image from Krutrim Storage without buffering the whole body
+            response = krutrim_storage.session.get(image_url, headers=headers, timeout=30, stream=True)
             
             if response.status_code == 200:
                 # Determine content type
                 content_type = image_record.content_type or 'image/jpeg'
                 
-                # Create HTTP response with image data
-                http_response = HttpResponse(
-                    response.content, 
+                # Relay the image to the client in 64 KB chunks, handing the
+                # connection back to the pool even if the client disconnects
+                def relay_image():
+                    try:
+                        yield from response.iter_content(chunk_size=64 * 1024)
+                    finally:
+                        response.close()
+                
+                http_response = StreamingHttpResponse(
+                    relay_image(),
                     content_type=content_type
                 )
+                if 'Content-Length' in response.headers:
+                    http_response['Content-Length'] = response.headers['Content-Length']
                 http_response['Content-Disposition'] = f'inline; filename="{image_record.original_filename}"'
                 http_response['Cache-Control'] = 'private, max-age=3600'  # Cache for 1 hour
+                http_response['ETag'] = etag
                 
                 return http_response
             else:
+                response.close()
                 return Response(
                     {'error': f'Failed to fetch image: HTTP {response.status_code}'}, 
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -413,41 +552,47 @@ class MRNViewSet(viewsets.ModelViewSet):
     search_fields = ['mrn_number', 'order__order_number', 'status']
     ordering_fields = ['mrn_date', 'mrn_number', 'status']
     
+    def get_queryset(self):
+        return super().get_queryset().select_related('order', 'approved_by', 'created_by')
+    
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
-        mrn = self.get_object()
-        mrn.status = 'APPROVED'
-        mrn.approved_by = request.user
-        mrn.save()
-        
-        # Update order status
-        mrn.order.status = 'MRN_CREATED'
-        mrn.order.mrn_date = mrn.mrn_date
-        mrn.order.save()
-        
-        # Create audit log
-        AuditLog.objects.create(
-            action='MRN_APPROVED',
-            model_name='MRN',
-            object_id=str(mrn.id),
-            user=request.user,
-            details={
-                'mrn_number': mrn.mrn_number,
-                'order_number': mrn.order.order_number
-            }
-        )
+        with transaction.atomic():
+            # Lock the MRN and its order so concurrent approvals can't interleave
+            mrn = get_object_or_404(self.get_queryset().select_for_update(of=('self', 'order')), pk=pk)
+            self.check_object_permissions(request, mrn)
+            
+            mrn.status = 'APPROVED'
+            mrn.approved_by = request.user
+            mrn.save(update_fields=['status', 'approved_by', 'updated_at'])
+            
+            # Update order status
+            mrn.order.status = 'MRN_CREATED'
+            mrn.order.mrn_date = mrn.mrn_date
+            mrn.order.save(update_fields=['status', 'mrn_date', 'updated_at'])
+            
+            # Create audit log
+            AuditLog.objects.create(
+                action='MRN_APPROVED',
+                model_name='MRN',
+                object_id=str(mrn.id),
+                user=request.user,
+                details={
+                    'mrn_number': mrn.mrn_number,
+                    'order_number': mrn.order.order_number
+                }
+            )
         
         serializer = self.get_serializer(mrn)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def pending(self, request):
-        pending_mrns = self.queryset.filter(status='PENDING')
-        serializer = self.get_serializer(pending_mrns, many=True)
-        return Response(serializer.data)
+        pending_mrns = self.get_queryset().filter(status='PENDING')
+        return paginated_response(self, pending_mrns)
 
 
 
@@ -456,6 +601,9 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = AuditLogSerializer
     search_fields = ['action', 'model_name', 'object_id', 'user__username']
     ordering_fields = ['created_at', 'action']
+    
+    def get_queryset(self):
+        return super().get_queryset().select_related('user')
 
 
 class AppSettingsViewSet(viewsets.ModelViewSet):
@@ -463,6 +611,9 @@ class AppSettingsViewSet(viewsets.ModelViewSet):
     serializer_class = AppSettingsSerializer
     search_fields = ['key', 'description']
     
+    def get_queryset(self):
+        return super().get_queryset().select_related('created_by')
+    
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
@@ -473,13 +624,16 @@ class NotificationTemplateViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'type']
     ordering_fields = ['name', 'type', 'created_at']
     
+    def get_queryset(self):
+        return super().get_queryset().select_related('created_by')
+    
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
     @action(detail=False, methods=['get'])
     def by_type(self, request):
         template_type = request.query_params.get('type', 'WHATSAPP')
-        templates = self.queryset.filter(type=template_type, is_active=True)
+        templates = self.get_queryset().filter(type=template_type, is_active=True)
         serializer = self.get_serializer(templates, many=True)
         return Response(serializer.data)
     
@@ -500,6 +654,11 @@ class DealerContextViewSet(viewsets.ModelViewSet):
     ]
     ordering_fields = ['interaction_date', 'dealer__name', 'priority_level', 'sentiment']
     
+    def get_queryset(self):
+        return super().get_queryset().select_related(
+            'dealer__created_by', 'created_by'
+        ).prefetch_related('products_mentioned__created_by')
+    
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
@@ -534,7 +693,7 @@ class DealerContextViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        contexts = self.queryset.filter(dealer_id=dealer_id)
+        contexts = self.get_queryset().filter(dealer_id=dealer_id)
         page = self.paginate_queryset(contexts)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -547,142 +706,159 @@ class DealerContextViewSet(viewsets.ModelViewSet):
     def follow_ups_due(self, request):
         """Get contexts with overdue follow-ups"""
         now = timezone.now()
-        overdue_contexts = self.queryset.filter(
+        overdue_contexts = self.get_queryset().filter(
             follow_up_required=True,
             follow_up_date__lt=now,
             issue_resolved=False
         )
         
-        serializer = self.get_serializer(overdue_contexts, many=True)
-        return Response(serializer.data)
+        return paginated_response(self, overdue_contexts)
     
     @action(detail=False, methods=['get'])
     def high_priority(self, request):
         """Get high priority contexts"""
-        high_priority_contexts = self.queryset.filter(
+        high_priority_contexts = self.get_queryset().filter(
             priority_level__in=['HIGH', 'CRITICAL']
         )
         
-        serializer = self.get_serializer(high_priority_contexts, many=True)
-        return Response(serializer.data)
+        return paginated_response(self, high_priority_contexts)
     
     @action(detail=False, methods=['get'])
     def recent_interactions(self, request):
         """Get recent interactions within last 7 days"""
         week_ago = timezone.now() - timedelta(days=7)
-        recent_contexts = self.queryset.filter(interaction_date__gte=week_ago)
+        recent_contexts = self.get_queryset().filter(interaction_date__gte=week_ago)
         
-        serializer = self.get_serializer(recent_contexts, many=True)
-        return Response(serializer.data)
+        return paginated_response(self, recent_contexts)
 
 
 # Dashboard and Analytics APIs
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def dashboard_stats(request):
-    today = date.today()
-    
-    stats = {
-        'orders_created_today': Order.objects.filter(created_at__date=today).count(),
-        'orders_billed_today': Order.objects.filter(updated_at__date=today, status='BILLED').count(),
-        'mrn_created_today': Order.objects.filter(updated_at__date=today, status='MRN_CREATED').count(),
-        'total_orders': Order.objects.count(),
-        'pending_orders': Order.objects.filter(status__in=['PENDING', 'CONFIRMED']).count(),
-        'completed_orders': Order.objects.filter(status='DELIVERED').count(),
-        'active_dealers': Dealer.objects.filter(is_active=True).count(),
-        'active_vehicles': Vehicle.objects.filter(is_active=True).count(),
-    }
+    def compute_dashboard_stats():
+        start, end = day_bounds(date.today())
+        stats = Order.objects.aggregate(
+            orders_created_today=Count('id', filter=Q(created_at__gte=start, created_at__lt=end)),
+            orders_billed_today=Count('id', filter=Q(updated_at__gte=start, updated_at__lt=end, status='BILLED')),
+            mrn_created_today=Count('id', filter=Q(updated_at__gte=start, updated_at__lt=end, status='MRN_CREATED')),
+            total_orders=Count('id'),
+            pending_orders=Count('id', filter=Q(status__in=['PENDING', 'CONFIRMED'])),
+            completed_orders=Count('id', filter=Q(status='DELIVERED')),
+        )
+        stats['active_dealers'] = Dealer.objects.filter(is_active=True).count()
+        stats['active_vehicles'] = Vehicle.objects.filter(is_active=True).count()
+        return DashboardStatsSerializer(stats).data
     
-    serializer = DashboardStatsSerializer(stats)
-    return Response(serializer.data)
+    organization = getattr(request, 'organization', None)
+    stats = cache.get_or_set(
+        dashboard_stats_cache_key(organization.id if organization else None),
+        compute_dashboard_stats,
+        timeout=DASHBOARD_STATS_CACHE_TIMEOUT
+    )
+    
+    # Let clients revalidate with If-None-Match instead of re-downloading unchanged stats
+    etag = quote_etag(hashlib.md5(json.dumps(stats, sort_keys=True).encode()).hexdigest())
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    
+    response = Response(stats)
+    response['ETag'] = etag
+    response['Cache-Control'] = f'private, max-age={DASHBOARD_STATS_CACHE_TIMEOUT}'
+    return response
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def dealer_analytics(request):
-    dealers = Dealer.objects.filter(is_active=True)
-    dealer_stats = []
-    
-    for dealer in dealers:
-        orders = Order.objects.filter(dealer=dealer)
+    def compute_dealer_stats():
         now = timezone.now()
         
-        stats = {
-            'dealer_id': dealer.id,
-            'dealer_name': dealer.name,
-            'weekly_orders': orders.filter(order_date__gte=now-timedelta(days=7)).count(),
-            'monthly_orders': orders.filter(order_date__gte=now-timedelta(days=30)).count(),
-            'total_orders': orders.count(),
-            'avg_order_value': orders.aggregate(
-                avg=Avg('order_items__quantity')
-            )['avg'] or 0,
-        }
-        dealer_stats.append(stats)
-    
-    # Sort by monthly orders descending
-    dealer_stats.sort(key=lambda x: x['monthly_orders'], reverse=True)
-    
-    serializer = DealerStatsSerializer(dealer_stats, many=True)
-    return Response(serializer.data)
+        # One GROUP BY over dealers; counts are distinct because the order_items join repeats orders
+        dealer_stats = Dealer.objects.filter(is_active=True).values(
+            dealer_id=F('id'), dealer_name=F('name')
+        ).annotate(
+            weekly_orders=Count('orders', distinct=True, filter=Q(orders__order_date__gte=now-timedelta(days=7))),
+            monthly_orders=Count('orders', distinct=True, filter=Q(orders__order_date__gte=now-timedelta(days=30))),
+            total_orders=Count('orders', distinct=True),
+            avg_order_value=Avg('orders__order_items__quantity', default=0),
+        ).order_by('-monthly_orders', 'name')
+        return DealerStatsSerializer(dealer_stats, many=True).data
+    
+    organization = getattr(request, 'organization', None)
+    return Response(cache.get_or_set(
+        analytics_cache_key('dealers', organization.id if organization else None),
+        compute_dealer_stats,
+        timeout=ANALYTICS_CACHE_TIMEOUT
+    ))
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def product_analytics(request):
-    products = Product.objects.filter(is_active=True)
-    product_stats = []
-    
-    for product in products:
-        order_items = OrderItem.objects.filter(product=product)
-        
-        stats = {
-            'product_name': product.name,
-            'total_orders': order_items.values('order').distinct().count(),
-            'total_quantity': order_items.aggregate(total=Sum('quantity'))['total'] or 0,
-            'avg_quantity_per_order': order_items.aggregate(avg=Avg('quantity'))['avg'] or 0,
-        }
-        product_stats.append(stats)
-    
-    # Sort by total quantity descending
-    product_stats.sort(key=lambda x: x['total_quantity'], reverse=True)
-    
-    serializer = ProductStatsSerializer(product_stats, many=True)
-    return Response(serializer.data)
+    def compute_product_stats():
+        product_stats = Product.objects.filter(is_active=True).values(
+            'id', product_name=F('name')
+        ).annotate(
+            total_orders=Count('orderitem__order', distinct=True),
+            total_quantity=Sum('orderitem__quantity', default=0),
+            avg_quantity_per_order=Avg('orderitem__quantity', default=0),
+        ).order_by('-total_quantity', 'name')
+        return ProductStatsSerializer(product_stats, many=True).data
+    
+    organization = getattr(request, 'organization', None)
+    return Response(cache.get_or_set(
+        analytics_cache_key('products', organization.id if organization else None),
+        compute_product_stats,
+        timeout=ANALYTICS_CACHE_TIMEOUT
+    ))
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def order_analytics(request):
     # Date range filter
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
+    start_param = request.query_params.get('start_date')
+    end_param = request.query_params.get('end_date')
+    try:
+        start_date = parse_date(start_param) if start_param else None
+        end_date = parse_date(end_param) if end_param else None
+    except ValueError:  # well formed but impossible, e.g. 2025-02-30
+        start_date = end_date = None
+    if (start_param and not start_date) or (end_param and not end_date):
+        return Response({'error': 'Invalid date format'}, status=status.HTTP_400_BAD_REQUEST)
     
     orders = Order.objects.all()
     
     if start_date:
-        orders = orders.filter(order_date__date__gte=start_date)
+        orders = orders.filter(order_date__gte=day_bounds(start_date)[0])
     if end_date:
-        orders = orders.filter(order_date__date__lte=end_date)
+        orders = orders.filter(order_date__lt=day_bounds(end_date)[1])
     
     # Status distribution
     status_counts = orders.values('status').annotate(count=Count('id'))
     
-    # Monthly trends (last 12 months)
-    monthly_stats = []
-    for i in range(12):
-        month_start = date.today().replace(day=1) - timedelta(days=i*30)
-        month_orders = orders.filter(
-            order_date__year=month_start.year,
-            order_date__month=month_start.month
+    # Monthly trends (last 12 calendar months, oldest first)
+    current_month = date.today().replace(day=1)
+    month_starts = [current_month - relativedelta(months=i) for i in range(11, -1, -1)]
+    monthly_totals = {
+        row['month'].date(): row
+        for row in orders.filter(order_date__gte=day_bounds(month_starts[0])[0]).annotate(
+            month=TruncMonth('order_date')
+        ).values('month').annotate(
+            order_count=Count('id', distinct=True),
+            total_quantity=Sum('order_items__quantity', default=0),
         )
-        
-        monthly_stats.append({
+    }
+    monthly_stats = [
+        {
             'month': month_start.strftime('%B %Y'),
-            'order_count': month_orders.count(),
-            'total_quantity': month_orders.aggregate(
-                total=Sum('order_items__quantity')
-            )['total'] or 0,
-        })
+            'order_count': monthly_totals.get(month_start, {}).get('order_count', 0),
+            'total_quantity': monthly_totals.get(month_start, {}).get('total_quantity', 0),
+        }
+        for month_start in month_starts
+    ]
     
     # Depot-wise distribution
     depot_stats = orders.values('depot__name').annotate(
@@ -692,7 +868,7 @@ def order_analytics(request):
     
     return Response({
         'status_distribution': list(status_counts),
-        'monthly_trends': monthly_stats[::-1],  # Reverse to show oldest first
+        'monthly_trends': monthly_stats,
         'depot_distribution': list(depot_stats),
         'total_orders': orders.count(),
         'avg_order_value': orders.aggregate(
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SylviaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sylvia'
+
+    def ready(self):
+        import sylvia.signals
@@ -12,7 +12,7 @@ class ProfileAwareAuthBackend(ModelBackend):
     Custom authentication backend that eagerly loads user profile and organization.
 
     This reduces database queries in the middleware by pre-loading the profile
-    relationship during authentication.
+    relationship whenever the session user is resolved.
     """
 
     def get_user(self, user_id):
@@ -25,18 +25,3 @@ class ProfileAwareAuthBackend(ModelBackend):
             return user
         except User.DoesNotExist:
             return None
-
-    def authenticate(self, request, username=None, password=None, **kwargs):
-        """
-        Authenticate user with profile pre-loading.
-        """
-        user = super().authenticate(request, username=username, password=password, **kwargs)
-        if user:
-            # Pre-load profile and organization
-            try:
-                # This loads the profile into cache
-                _ = user.profile.organization
-            except Exception:
-                # Profile doesn't exist yet, that's ok
-                pass
-        return user
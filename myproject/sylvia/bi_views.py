@@ -2,99 +2,197 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.db.models import Count, Sum, Avg, Q, F, Case, When, IntegerField, Max
+from django.db.models.functions import TruncMonth
+from django.core.cache import cache
 from django.utils import timezone
-from datetime import date, timedelta, datetime
+from django.utils.dateparse import parse_date
+from datetime import timedelta
 from decimal import Decimal
-import calendar
+from functools import wraps
+from urllib.parse import urlencode
+import hashlib
+import logging
+import time
 from collections import defaultdict
+from dateutil.relativedelta import relativedelta
 
+from .api_views import day_bounds
 from .models import (
     Order, OrderItem, Depot, Product, Vehicle, Dealer, MRN
 )
 
 
+logger = logging.getLogger(__name__)
+
+BI_CACHE_TIMEOUT = 120  # seconds
+
+BI_DEFAULT_LOOKBACK_DAYS = 365
+
+
+def bi_cache_version_key(organization_id):
+    """Cache key holding the current BI payload generation of one organization"""
+    return f'bi_cache_version:{organization_id}'
+
+
+ACTIVE_VEHICLES_CACHE_TIMEOUT = 300  # seconds
+
+
+def active_vehicles_cache_key(organization_id):
+    """Cache key for the active vehicle count of one organization"""
+    return f'bi_active_vehicles:{organization_id}'
+
+
+def bump_bi_cache_version(organization_id):
+    """Retire every cached BI payload of an organization after its orders change"""
+    cache.set(bi_cache_version_key(organization_id), time.time_ns(), None)
+
+
+def cached_bi_response(name):
+    """Cache a BI view's payload per organization and query string for BI_CACHE_TIMEOUT"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            organization = getattr(request, 'organization', None)
+            organization_id = organization.id if organization else None
+            query = urlencode(sorted(request.query_params.lists()), doseq=True)
+            key = f'bi:{name}:{organization_id}:{hashlib.md5(query.encode()).hexdigest()}'
+            version = cache.get(bi_cache_version_key(organization_id), 0)
+            
+            data = cache.get(key, version=version)
+            if data is not None:
+                logger.debug("BI cache hit: %s", name)
+                return Response(data)
+            
+            logger.debug("BI cache miss: %s", name)
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, BI_CACHE_TIMEOUT, version=version)
+            return response
+        return wrapper
+    return decorator
+
+
+def parse_depot_id(value):
+    """Depot id from a query param, or None when absent, 'all' or malformed"""
+    if not value or value == 'all':
+        return None
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def parse_filter_date(value):
+    """Date from a YYYY-MM-DD query param, or None when absent or malformed"""
+    if not value:
+        return None
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
+
+
+def parse_start_date(value, end_date=None):
+    """start_date bounded to BI_DEFAULT_LOOKBACK_DAYS before end_date (or today) when omitted; 'all' lifts the bound"""
+    if value == 'all':
+        return None
+    start_date = parse_filter_date(value)
+    if start_date is None:
+        start_date = (end_date or timezone.localdate()) - timedelta(days=BI_DEFAULT_LOOKBACK_DAYS)
+    return start_date
+
+
+def filter_orders(orders, depot_id=None, start_date=None, end_date=None):
+    """Narrow an Order queryset by the parsed depot and local-day date range filters"""
+    if depot_id is not None:
+        orders = orders.filter(depot_id=depot_id)
+    if start_date:
+        orders = orders.filter(order_date__gte=day_bounds(start_date)[0])
+    if end_date:
+        orders = orders.filter(order_date__lt=day_bounds(end_date)[1])
+    return orders
+
+
+def anonymous_dealer_ids():
+    """Subquery of the current organization's 'anonymous' (stock) dealer ids"""
+    return Dealer.objects.filter(name_lower='anonymous').values('id')
+
+
+def rank_depots(depot_summary, metric):
+    """Map each depot name to its 1-based position when sorted by metric, highest first"""
+    ranks = {}
+    for position, depot in enumerate(sorted(depot_summary, key=lambda x: x[metric], reverse=True), start=1):
+        ranks.setdefault(depot['depot_name'], position)
+    return ranks
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_bi_response('executive_summary')
 def executive_summary(request):
     """
     Executive Dashboard API - Main KPIs and overview metrics
-    Query params: depot_id, start_date, end_date
+    Query params: depot_id, start_date (defaults to a year back, 'all' for no bound), end_date
     """
     # Parse query parameters
-    depot_id = request.query_params.get('depot_id')
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
+    depot_id = parse_depot_id(request.query_params.get('depot_id'))
+    end_date = parse_filter_date(request.query_params.get('end_date'))
+    start_date = parse_start_date(request.query_params.get('start_date'), end_date)
     
-    # Base queryset
-    orders = Order.objects.all()
+    # Base queryset with filters applied
+    orders = filter_orders(Order.objects.all(), depot_id, start_date, end_date)
     
-    # Apply filters
-    if depot_id and depot_id != 'all':
-        try:
-            depot_id = int(depot_id)
-            orders = orders.filter(depot_id=depot_id)
-        except (ValueError, TypeError):
-            pass
-    
-    if start_date:
-        try:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            orders = orders.filter(order_date__date__gte=start_date)
-        except ValueError:
-            pass
-    
-    if end_date:
-        try:
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-            orders = orders.filter(order_date__date__lte=end_date)
-        except ValueError:
-            pass
+    # Month boundaries for month-over-month trends
+    now = timezone.now().date()
+    current_month_start = now.replace(day=1)
     
-    # Calculate KPIs
-    total_orders = orders.count()
+    prev_month_start = current_month_start - relativedelta(months=1)
+    
+    # All KPIs and trend inputs in one query; counts are distinct because
+    # the order_items join repeats orders
+    stock_filter = Q(dealer_id__in=anonymous_dealer_ids())
+    current_month_begins = day_bounds(current_month_start)[0]
+    prev_month_begins = day_bounds(prev_month_start)[0]
+    current_month_filter = Q(order_date__gte=current_month_begins)
+    prev_month_filter = Q(order_date__gte=prev_month_begins, order_date__lt=current_month_begins)
+    kpis = orders.aggregate(
+        total_orders=Count('id', distinct=True),
+        stock_orders=Count('id', distinct=True, filter=stock_filter),
+        billed_orders=Count('id', distinct=True, filter=Q(status='BILLED')),
+        total_quantity=Sum('order_items__quantity'),
+        vehicles_with_stock=Count('vehicle', distinct=True, filter=stock_filter),
+        current_month_orders=Count('id', distinct=True, filter=current_month_filter & Q(order_date__lt=day_bounds(now)[0])),
+        prev_month_orders=Count('id', distinct=True, filter=prev_month_filter),
+        current_month_qty=Sum('order_items__quantity', filter=current_month_filter),
+        prev_month_qty=Sum('order_items__quantity', filter=prev_month_filter),
+    )
+    
+    total_orders = kpis['total_orders']
     
     # Stock orders (anonymous dealer)
-    stock_orders = orders.filter(dealer__name__iexact='anonymous').count()
+    stock_orders = kpis['stock_orders']
     regular_orders = total_orders - stock_orders
     
     # Total quantity billed (from order items)
-    total_quantity = orders.aggregate(
-        total=Sum('order_items__quantity')
-    )['total'] or 0
+    total_quantity = kpis['total_quantity'] or 0
     
-    # Active vehicles count
-    active_vehicles = Vehicle.objects.filter(is_active=True).count()
+    # Active vehicles count (cached, invalidated by Vehicle signals)
+    organization = getattr(request, 'organization', None)
+    active_vehicles = cache.get_or_set(
+        active_vehicles_cache_key(organization.id if organization else None),
+        lambda: Vehicle.objects.filter(is_active=True).count(),
+        timeout=ACTIVE_VEHICLES_CACHE_TIMEOUT
+    )
     
     # Vehicles with stock (carrying anonymous dealer orders)
-    vehicles_with_stock = orders.filter(
-        dealer__name__iexact='anonymous'
-    ).values('vehicle').distinct().count()
+    vehicles_with_stock = kpis['vehicles_with_stock']
     
     # Completion rate (billed orders / total orders)
-    billed_orders = orders.filter(status='BILLED').count()
+    billed_orders = kpis['billed_orders']
     completion_rate = (billed_orders / total_orders * 100) if total_orders > 0 else 0
     
-    # Calculate month-over-month trends
-    now = timezone.now().date()
-    current_month_start = now.replace(day=1)
-    
-    # Previous month
-    if current_month_start.month == 1:
-        prev_month_start = current_month_start.replace(year=current_month_start.year - 1, month=12)
-    else:
-        prev_month_start = current_month_start.replace(month=current_month_start.month - 1)
-    
-    # Current month orders
-    current_month_orders = orders.filter(
-        order_date__date__gte=current_month_start,
-        order_date__date__lt=now
-    ).count()
-    
-    # Previous month orders
-    prev_month_orders = orders.filter(
-        order_date__date__gte=prev_month_start,
-        order_date__date__lt=current_month_start
-    ).count()
+    current_month_orders = kpis['current_month_orders']
+    prev_month_orders = kpis['prev_month_orders']
     
     # Calculate trends
     orders_mom = 0
@@ -103,16 +201,8 @@ def executive_summary(request):
     if prev_month_orders > 0:
         orders_mom = ((current_month_orders - prev_month_orders) / prev_month_orders) * 100
     
-    # Current month quantity
-    current_month_qty = orders.filter(
-        order_date__date__gte=current_month_start
-    ).aggregate(total=Sum('order_items__quantity'))['total'] or 0
-    
-    # Previous month quantity
-    prev_month_qty = orders.filter(
-        order_date__date__gte=prev_month_start,
-        order_date__date__lt=current_month_start
-    ).aggregate(total=Sum('order_items__quantity'))['total'] or 0
+    current_month_qty = kpis['current_month_qty'] or 0
+    prev_month_qty = kpis['prev_month_qty'] or 0
     
     if prev_month_qty > 0:
         quantity_mom = ((float(current_month_qty) - float(prev_month_qty)) / float(prev_month_qty)) * 100
@@ -134,12 +224,8 @@ def executive_summary(request):
         date_range = f"Until {end_date}"
     
     depot_filter = "all"
-    if depot_id and depot_id != 'all':
-        try:
-            depot = Depot.objects.get(id=depot_id)
-            depot_filter = depot.name
-        except Depot.DoesNotExist:
-            pass
+    if depot_id is not None:
+        depot_filter = Depot.objects.filter(id=depot_id).values_list('name', flat=True).first() or depot_filter
     
     return Response({
         "date_range": date_range,
@@ -163,66 +249,50 @@ def executive_summary(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_bi_response('stock_analytics')
 def stock_analytics(request):
     """
     Stock Management API - All stock-related analytics (anonymous dealer orders)
-    Query params: depot_id, start_date, end_date, product_ids[]
+    Query params: depot_id, start_date (defaults to a year back, 'all' for no bound), end_date, product_ids[]
     """
     # Parse query parameters
-    depot_id = request.query_params.get('depot_id')
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
+    depot_id = parse_depot_id(request.query_params.get('depot_id'))
+    end_date = parse_filter_date(request.query_params.get('end_date'))
+    start_date = parse_start_date(request.query_params.get('start_date'), end_date)
     product_ids = request.query_params.getlist('product_ids[]')
     
-    # Base queryset for stock orders (anonymous dealer)
-    stock_orders = Order.objects.filter(dealer__name__iexact='anonymous')
-    
-    # Apply filters
-    if depot_id and depot_id != 'all':
-        try:
-            depot_id = int(depot_id)
-            stock_orders = stock_orders.filter(depot_id=depot_id)
-        except (ValueError, TypeError):
-            pass
-    
-    if start_date:
-        try:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            stock_orders = stock_orders.filter(order_date__date__gte=start_date)
-        except ValueError:
-            pass
-    
-    if end_date:
-        try:
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-            stock_orders = stock_orders.filter(order_date__date__lte=end_date)
-        except ValueError:
-            pass
+    # Base queryset for stock orders (anonymous dealer) with filters applied
+    stock_orders = filter_orders(
+        Order.objects.filter(dealer_id__in=anonymous_dealer_ids()), depot_id, start_date, end_date
+    )
     
     if product_ids:
         try:
             product_ids = [int(pid) for pid in product_ids if pid.isdigit()]
-            stock_orders = stock_orders.filter(order_items__product_id__in=product_ids).distinct()
+            # Every query below groups or aggregates, so the repeated orders from this
+            # join need no DISTINCT, and the sums stay limited to the chosen products
+            stock_orders = stock_orders.filter(order_items__product_id__in=product_ids)
         except (ValueError, TypeError):
             pass
     
+    # Per-depot stock figures, which the summary totals are summed from; counts
+    # are distinct because the order_items join repeats orders
+    depot_stats = list(stock_orders.values('depot__id', 'depot__name').annotate(
+        stock_orders=Count('id', distinct=True),
+        stock_quantity=Sum('order_items__quantity'),
+        vehicles_count=Count('vehicle', distinct=True)
+    ).order_by('-stock_quantity'))
+    
     # Stock summary
-    total_stock_orders = stock_orders.count()
-    total_stock_quantity = stock_orders.aggregate(
-        total=Sum('order_items__quantity')
-    )['total'] or 0
+    total_stock_orders = sum(depot_stat['stock_orders'] for depot_stat in depot_stats)
+    total_stock_quantity = sum(depot_stat['stock_quantity'] or 0 for depot_stat in depot_stats)
     
+    # A vehicle can carry stock for several depots, so this needs its own distinct count
     vehicles_carrying_stock = stock_orders.values('vehicle').distinct().count()
     avg_stock_per_vehicle = float(total_stock_quantity) / vehicles_carrying_stock if vehicles_carrying_stock > 0 else 0
     
     # Stock by depot
     stock_by_depot = []
-    depot_stats = stock_orders.values('depot__id', 'depot__name').annotate(
-        stock_orders=Count('id'),
-        stock_quantity=Sum('order_items__quantity'),
-        vehicles_count=Count('vehicle', distinct=True)
-    ).order_by('-stock_quantity')
-    
     total_quantity_float = float(total_stock_quantity) if total_stock_quantity > 0 else 0
     
     for depot_stat in depot_stats:
@@ -290,130 +360,115 @@ def monthly_trends(request):
     Query params: depot_id, granularity (monthly/weekly), months_back, include_stock
     """
     # Parse query parameters
-    depot_id = request.query_params.get('depot_id')
+    depot_id = parse_depot_id(request.query_params.get('depot_id'))
     granularity = request.query_params.get('granularity', 'monthly')
     months_back = int(request.query_params.get('months_back', 12))
     include_stock = request.query_params.get('include_stock', 'true').lower() == 'true'
     
-    # Base queryset
-    orders = Order.objects.all()
-    
-    # Apply depot filter
-    if depot_id and depot_id != 'all':
-        try:
-            depot_id = int(depot_id)
-            orders = orders.filter(depot_id=depot_id)
-        except (ValueError, TypeError):
-            pass
-    
-    # Calculate date range
-    now = timezone.now().date()
-    start_date = now.replace(day=1) - timedelta(days=months_back * 30)
-    orders = orders.filter(order_date__date__gte=start_date)
+    # Base queryset with depot filter applied
+    orders = filter_orders(Order.objects.all(), depot_id)
+    
+    # Calculate date range (calendar months, oldest first)
+    current_month_start = timezone.now().date().replace(day=1)
+    month_starts = [current_month_start - relativedelta(months=i) for i in range(months_back - 1, -1, -1)]
+    orders = orders.filter(order_date__gte=day_bounds(month_starts[0] if month_starts else current_month_start)[0])
+    
+    # One grouped query per breakdown instead of several queries per month and depot
+    monthly_orders = orders.annotate(month=TruncMonth('order_date'))
+    depot_months = monthly_orders.values('month', 'depot_id', 'depot__name').annotate(
+        order_count=Count('id', distinct=True),
+        billed_count=Count('id', distinct=True, filter=Q(status='BILLED')),
+        stock_count=Count('id', distinct=True, filter=Q(dealer_id__in=anonymous_dealer_ids())),
+        quantity=Sum('order_items__quantity')
+    )
+    product_months = monthly_orders.values('month', 'order_items__product__name').annotate(
+        quantity=Sum('order_items__quantity')
+    )
+    
+    month_totals = defaultdict(lambda: {'orders': 0, 'stock_orders': 0, 'quantity': 0})
+    month_depot_quantities = defaultdict(lambda: defaultdict(int))
+    depot_months_by_id = defaultdict(dict)
+    for row in depot_months:
+        month = row['month'].date()
+        quantity = row['quantity'] or 0
+        totals = month_totals[month]
+        totals['orders'] += row['order_count']
+        totals['stock_orders'] += row['stock_count']
+        totals['quantity'] += quantity
+        if row['depot__name']:
+            month_depot_quantities[month][row['depot__name']] += quantity
+        depot_months_by_id[row['depot_id']][month] = row
+    
+    month_product_quantities = defaultdict(list)
+    for row in product_months:
+        if row['order_items__product__name']:
+            month_product_quantities[row['month'].date()].append(
+                (row['order_items__product__name'], row['quantity'] or 0)
+            )
     
     # Generate monthly data
     quantity_billed_trends = []
     order_trends = []
     
-    for i in range(months_back):
-        # Calculate month start and end
-        month_date = now.replace(day=1) - timedelta(days=i * 30)
-        month_start = month_date.replace(day=1)
-        
-        # Calculate next month start
-        if month_start.month == 12:
-            next_month_start = month_start.replace(year=month_start.year + 1, month=1)
-        else:
-            next_month_start = month_start.replace(month=month_start.month + 1)
-        
-        month_orders = orders.filter(
-            order_date__date__gte=month_start,
-            order_date__date__lt=next_month_start
-        )
-        
-        # Total quantity for this month
-        total_quantity = month_orders.aggregate(
-            total=Sum('order_items__quantity')
-        )['total'] or 0
+    for month_start in month_starts:
+        totals = month_totals[month_start]
         
         # Quantity by depot
-        by_depot = []
-        depot_quantities = month_orders.values('depot__name').annotate(
-            quantity=Sum('order_items__quantity')
-        ).order_by('-quantity')
-        
-        for depot_qty in depot_quantities:
-            if depot_qty['depot__name']:
-                by_depot.append({
-                    "depot_name": depot_qty['depot__name'],
-                    "quantity": round(float(depot_qty['quantity'] or 0), 2)
-                })
+        by_depot = [
+            {
+                "depot_name": depot_name,
+                "quantity": round(float(quantity), 2)
+            }
+            for depot_name, quantity in sorted(
+                month_depot_quantities[month_start].items(), key=lambda item: item[1], reverse=True
+            )
+        ]
         
         # Quantity by product
-        by_product = []
-        product_quantities = month_orders.values('order_items__product__name').annotate(
-            quantity=Sum('order_items__quantity')
-        ).order_by('-quantity')[:5]  # Top 5 products
-        
-        for product_qty in product_quantities:
-            if product_qty['order_items__product__name']:
-                by_product.append({
-                    "product_name": product_qty['order_items__product__name'],
-                    "quantity": round(float(product_qty['quantity'] or 0), 2)
-                })
+        by_product = [
+            {
+                "product_name": product_name,
+                "quantity": round(float(quantity), 2)
+            }
+            for product_name, quantity in sorted(
+                month_product_quantities[month_start], key=lambda item: item[1], reverse=True
+            )[:5]  # Top 5 products
+        ]
         
         quantity_billed_trends.append({
             "month": month_start.strftime('%Y-%m'),
-            "total_quantity": round(float(total_quantity), 2),
+            "total_quantity": round(float(totals['quantity']), 2),
             "by_depot": by_depot,
             "by_product": by_product
         })
         
         # Order trends
-        total_orders = month_orders.count()
-        stock_orders = month_orders.filter(dealer__name__iexact='anonymous').count() if include_stock else 0
+        total_orders = totals['orders']
+        stock_orders = totals['stock_orders'] if include_stock else 0
         regular_orders = total_orders - stock_orders
         
         order_trends.append({
             "month": month_start.strftime('%Y-%m'),
             "total_orders": total_orders,
-            "stock_orders": stock_orders if include_stock else 0,
+            "stock_orders": stock_orders,
             "regular_orders": regular_orders
         })
     
-    # Reverse to show oldest first
-    quantity_billed_trends.reverse()
-    order_trends.reverse()
-    
     # Depot performance over time
     depot_performance = []
-    depots = Depot.objects.filter(is_active=True)
+    depots = Depot.objects.filter(is_active=True).values_list('id', 'name', named=True)
     
     for depot in depots:
         monthly_data = []
-        depot_orders = orders.filter(depot=depot)
+        depot_month_rows = depot_months_by_id.get(depot.id, {})
         
-        for i in range(months_back):
-            month_date = now.replace(day=1) - timedelta(days=i * 30)
-            month_start = month_date.replace(day=1)
-            
-            if month_start.month == 12:
-                next_month_start = month_start.replace(year=month_start.year + 1, month=1)
-            else:
-                next_month_start = month_start.replace(month=month_start.month + 1)
-            
-            month_depot_orders = depot_orders.filter(
-                order_date__date__gte=month_start,
-                order_date__date__lt=next_month_start
-            )
-            
-            total_orders = month_depot_orders.count()
-            total_quantity = month_depot_orders.aggregate(
-                total=Sum('order_items__quantity')
-            )['total'] or 0
+        for month_start in month_starts:
+            row = depot_month_rows.get(month_start)
+            total_orders = row['order_count'] if row else 0
+            total_quantity = (row['quantity'] or 0) if row else 0
             
             # Simple efficiency score based on completion rate
-            billed_orders = month_depot_orders.filter(status='BILLED').count()
+            billed_orders = row['billed_count'] if row else 0
             efficiency_score = (billed_orders / total_orders * 100) if total_orders > 0 else 0
             
             monthly_data.append({
@@ -423,8 +478,6 @@ def monthly_trends(request):
                 "efficiency_score": round(efficiency_score, 1)
             })
         
-        monthly_data.reverse()  # Oldest first
-        
         # Only include depots with some activity
         if any(data['orders'] > 0 for data in monthly_data):
             depot_performance.append({
@@ -447,100 +500,91 @@ def depot_analytics(request):
     Query params: start_date, end_date, include_stock
     """
     # Parse query parameters
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
+    start_date = parse_filter_date(request.query_params.get('start_date'))
+    end_date = parse_filter_date(request.query_params.get('end_date'))
     include_stock = request.query_params.get('include_stock', 'true').lower() == 'true'
     
-    # Base queryset
-    orders = Order.objects.all()
-    
-    # Apply date filters
-    if start_date:
-        try:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            orders = orders.filter(order_date__date__gte=start_date)
-        except ValueError:
-            pass
-    
-    if end_date:
-        try:
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-            orders = orders.filter(order_date__date__lte=end_date)
-        except ValueError:
-            pass
+    # Base queryset with date filters applied
+    orders = filter_orders(Order.objects.all(), start_date=start_date, end_date=end_date)
+    
+    # Per-depot totals, monthly figures and product quantities in three grouped
+    # queries; counts are distinct because the order_items join repeats orders
+    depot_totals = {
+        row['depot_id']: row
+        for row in orders.values('depot_id').annotate(
+            total_orders=Count('id', distinct=True),
+            stock_orders=Count('id', distinct=True, filter=Q(dealer_id__in=anonymous_dealer_ids())),
+            billed_orders=Count('id', distinct=True, filter=Q(status='BILLED')),
+            total_quantity=Sum('order_items__quantity'),
+            active_vehicles=Count('vehicle', distinct=True)
+        )
+    }
+    
+    # Monthly performance (last 6 calendar months, oldest first)
+    current_month_start = timezone.now().date().replace(day=1)
+    month_starts = [current_month_start - relativedelta(months=i) for i in range(5, -1, -1)]
+    depot_months = defaultdict(dict)
+    for row in orders.filter(order_date__gte=day_bounds(month_starts[0])[0]).annotate(
+        month=TruncMonth('order_date')
+    ).values('depot_id', 'month').annotate(
+        orders=Count('id', distinct=True),
+        quantity=Sum('order_items__quantity')
+    ):
+        depot_months[row['depot_id']][row['month'].date()] = row
+    
+    depot_products = defaultdict(list)
+    for row in orders.values('depot_id', 'order_items__product__name').annotate(
+        quantity=Sum('order_items__quantity')
+    ):
+        if row['order_items__product__name']:
+            depot_products[row['depot_id']].append(row)
     
     # Get all active depots
-    depots = Depot.objects.filter(is_active=True)
+    depots = Depot.objects.filter(is_active=True).values_list('id', 'name', named=True)
     depot_summary = []
     
     for depot in depots:
-        depot_orders = orders.filter(depot=depot)
+        totals = depot_totals.get(depot.id, {})
         
         # Basic counts
-        total_orders = depot_orders.count()
+        total_orders = totals.get('total_orders', 0)
         if not include_stock:
             stock_orders = 0
             regular_orders = total_orders
         else:
-            stock_orders = depot_orders.filter(dealer__name__iexact='anonymous').count()
+            stock_orders = totals.get('stock_orders', 0)
             regular_orders = total_orders - stock_orders
         
         # Total quantity
-        total_quantity = depot_orders.aggregate(
-            total=Sum('order_items__quantity')
-        )['total'] or 0
+        total_quantity = totals.get('total_quantity') or 0
         
         # Active vehicles for this depot
-        active_vehicles = depot_orders.values('vehicle').distinct().count()
+        active_vehicles = totals.get('active_vehicles', 0)
         
         # Completion rate
-        billed_orders = depot_orders.filter(status='BILLED').count()
+        billed_orders = totals.get('billed_orders', 0)
         completion_rate = (billed_orders / total_orders * 100) if total_orders > 0 else 0
         
         # Top products for this depot
-        top_products = []
-        product_stats = depot_orders.values('order_items__product__name').annotate(
-            quantity=Sum('order_items__quantity')
-        ).order_by('-quantity')[:3]
-        
-        for product_stat in product_stats:
-            if product_stat['order_items__product__name']:
-                top_products.append({
-                    "product_name": product_stat['order_items__product__name'],
-                    "quantity": round(float(product_stat['quantity'] or 0), 2)
-                })
+        top_products = [
+            {
+                "product_name": product_stat['order_items__product__name'],
+                "quantity": round(float(product_stat['quantity'] or 0), 2)
+            }
+            for product_stat in sorted(
+                depot_products[depot.id], key=lambda x: x['quantity'] or 0, reverse=True
+            )[:3]
+        ]
         
-        # Monthly performance (last 6 months)
         monthly_performance = []
-        now = timezone.now().date()
-        
-        for i in range(6):
-            month_date = now.replace(day=1) - timedelta(days=i * 30)
-            month_start = month_date.replace(day=1)
-            
-            if month_start.month == 12:
-                next_month_start = month_start.replace(year=month_start.year + 1, month=1)
-            else:
-                next_month_start = month_start.replace(month=month_start.month + 1)
-            
-            month_orders = depot_orders.filter(
-                order_date__date__gte=month_start,
-                order_date__date__lt=next_month_start
-            )
-            
-            month_total_orders = month_orders.count()
-            month_quantity = month_orders.aggregate(
-                total=Sum('order_items__quantity')
-            )['total'] or 0
-            
+        for month_start in month_starts:
+            month_row = depot_months[depot.id].get(month_start, {})
             monthly_performance.append({
                 "month": month_start.strftime('%Y-%m'),
-                "orders": month_total_orders,
-                "quantity": round(float(month_quantity), 2)
+                "orders": month_row.get('orders', 0),
+                "quantity": round(float(month_row.get('quantity') or 0), 2)
             })
         
-        monthly_performance.reverse()  # Oldest first
-        
         depot_summary.append({
             "depot_id": depot.id,
             "depot_name": depot.name,
@@ -560,24 +604,19 @@ def depot_analytics(request):
     # Depot comparison matrix
     performance_matrix = []
     
-    # Sort by different metrics for ranking
-    orders_ranking = sorted(depot_summary, key=lambda x: x['total_orders'], reverse=True)
-    quantity_ranking = sorted(depot_summary, key=lambda x: x['total_quantity'], reverse=True)
-    efficiency_ranking = sorted(depot_summary, key=lambda x: x['completion_rate'], reverse=True)
+    # Rank depots by different metrics
+    orders_ranks = rank_depots(depot_summary, 'total_orders')
+    quantity_ranks = rank_depots(depot_summary, 'total_quantity')
+    efficiency_ranks = rank_depots(depot_summary, 'completion_rate')
     
     for depot in depot_summary:
         depot_name = depot['depot_name']
         
-        # Find ranks
-        orders_rank = next(i + 1 for i, d in enumerate(orders_ranking) if d['depot_name'] == depot_name)
-        quantity_rank = next(i + 1 for i, d in enumerate(quantity_ranking) if d['depot_name'] == depot_name)
-        efficiency_rank = next(i + 1 for i, d in enumerate(efficiency_ranking) if d['depot_name'] == depot_name)
-        
         performance_matrix.append({
             "depot_name": depot_name,
-            "orders_rank": orders_rank,
-            "quantity_rank": quantity_rank,
-            "efficiency_rank": efficiency_rank
+            "orders_rank": orders_ranks[depot_name],
+            "quantity_rank": quantity_ranks[depot_name],
+            "efficiency_rank": efficiency_ranks[depot_name]
         })
     
     return Response({
@@ -597,84 +636,57 @@ def operations_live(request):
     today = timezone.now().date()
     now = timezone.now()
     
-    # Today's metrics
-    today_orders = Order.objects.filter(created_at__date=today)
-    
-    orders_created = today_orders.count()
-    stock_orders_created = today_orders.filter(dealer__name__iexact='anonymous').count()
-    
-    # MRN completed today (orders with MRN date set to today)
-    mrn_completed = Order.objects.filter(mrn_date=today).count()
-    
-    # Orders billed today
-    orders_billed = Order.objects.filter(bill_date=today).count()
-    
-    # Vehicles loaded today (distinct vehicles from today's orders)
-    vehicles_loaded = today_orders.values('vehicle').distinct().count()
-    
-    # Pending actions
-    pending_mrn = Order.objects.filter(
-        Q(mrn_date__isnull=True) | Q(status='PENDING')
-    ).count()
-    
-    pending_billing = Order.objects.filter(
-        mrn_date__isnull=False,
-        bill_date__isnull=True
-    ).count()
-    
-    # Overdue orders (older than 7 days without MRN)
+    # Today's metrics and pending actions in one query
+    today_start, today_end = day_bounds(today)
+    today_filter = Q(created_at__gte=today_start, created_at__lt=today_end)
     week_ago = now - timedelta(days=7)
-    overdue_orders = Order.objects.filter(
-        order_date__lt=week_ago,
-        mrn_date__isnull=True
-    ).count()
-    
-    # Active vehicles with stock details
-    active_vehicles = []
-    stock_vehicle_orders = Order.objects.filter(
-        dealer__name__iexact='anonymous',
-        order_date__date__gte=today - timedelta(days=30)  # Last 30 days
-    ).select_related('vehicle', 'depot').prefetch_related('order_items')
-    
-    # Group by vehicle
-    vehicle_stock_map = defaultdict(lambda: {
-        'depot': '',
-        'quantity': 0,
-        'truck_number': ''
-    })
-    
-    for order in stock_vehicle_orders:
-        vehicle_key = order.vehicle.id
-        total_quantity = sum(item.quantity for item in order.order_items.all())
-        
-        vehicle_stock_map[vehicle_key]['truck_number'] = order.vehicle.truck_number
-        vehicle_stock_map[vehicle_key]['depot'] = order.depot.name if order.depot else 'Unknown'
-        vehicle_stock_map[vehicle_key]['quantity'] += float(total_quantity)
-    
-    # Convert to list format
-    for vehicle_id, data in list(vehicle_stock_map.items())[:20]:  # Limit to 20 vehicles
-        active_vehicles.append({
-            "truck_number": data['truck_number'],
-            "depot": data['depot'],
+    live_counts = Order.objects.aggregate(
+        orders_created=Count('id', filter=today_filter),
+        stock_orders_created=Count('id', filter=today_filter & Q(dealer_id__in=anonymous_dealer_ids())),
+        # MRN completed today (orders with MRN date set to today)
+        mrn_completed=Count('id', filter=Q(mrn_date=today)),
+        # Orders billed today
+        orders_billed=Count('id', filter=Q(bill_date=today)),
+        # Vehicles loaded today (distinct vehicles from today's orders)
+        vehicles_loaded=Count('vehicle', distinct=True, filter=today_filter),
+        # Pending actions
+        pending_mrn=Count('id', filter=Q(mrn_date__isnull=True) | Q(status='PENDING')),
+        pending_billing=Count('id', filter=Q(mrn_date__isnull=False, bill_date__isnull=True)),
+        # Overdue orders (older than 7 days without MRN)
+        overdue_orders=Count('id', filter=Q(order_date__lt=week_ago, mrn_date__isnull=True)),
+    )
+    
+    # Active vehicles with stock details, aggregated per vehicle in SQL
+    vehicle_stats = Order.objects.filter(
+        dealer_id__in=anonymous_dealer_ids(),
+        order_date__gte=day_bounds(today - timedelta(days=30))[0]  # Last 30 days
+    ).values('vehicle_id', 'vehicle__truck_number').annotate(
+        quantity=Sum('order_items__quantity', default=0),
+        depot_name=Max('depot__name')
+    ).order_by('-quantity', 'vehicle__truck_number')[:20]  # Top 20 vehicles
+    
+    active_vehicles = [
+        {
+            "truck_number": vehicle_stat['vehicle__truck_number'],
+            "depot": vehicle_stat['depot_name'] or 'Unknown',
             "status": "carrying_stock",
-            "quantity": round(data['quantity'], 2)
-        })
-    
-    # Sort by quantity (descending)
-    active_vehicles.sort(key=lambda x: x['quantity'], reverse=True)
+            "quantity": round(float(vehicle_stat['quantity']), 2)
+        }
+        for vehicle_stat in vehicle_stats
+    ]
     
     return Response({
         "today_metrics": {
-            "orders_created": orders_created,
-            "stock_orders_created": stock_orders_created,
-            "mrn_completed": mrn_completed,
-            "orders_billed": orders_billed,
-            "vehicles_loaded": vehicles_loaded
+            "orders_created": live_counts['orders_created'],
+            "stock_orders_created": live_counts['stock_orders_created'],
+            "mrn_completed": live_counts['mrn_completed'],
+            "orders_billed": live_counts['orders_billed'],
+            "vehicles_loaded": live_counts['vehicles_loaded']
         },
         "pending_actions": {
-            "pending_mrn": pending_mrn,
-            "pending_billing": pending_billing,
-            "overdue_orders": overdue_orders
+            "pending_mrn": live_counts['pending_mrn'],
+            "pending_billing": live_counts['pending_billing'],
+            "overdue_orders": live_counts['overdue_orders']
         },
         "active_vehicles": active_vehicles
     })
\ No newline at end of file
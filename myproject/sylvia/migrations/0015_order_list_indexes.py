@@ -0,0 +1,56 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Trigram indexes let icontains searches on the order list use an index scan.
+# PostgreSQL compiles icontains to UPPER(col::text) LIKE UPPER(%s), so the
+# indexes are built on that expression; a bare-column index would never match.
+# They are PostgreSQL-only, so SQLite development databases skip them.
+TRIGRAM_INDEXES = [
+    ('sylvia_order_number_trgm_idx', 'sylvia_order', 'order_number'),
+    ('sylvia_dealer_name_trgm_idx', 'sylvia_dealer', 'name'),
+    ('sylvia_vehicle_truck_number_trgm_idx', 'sylvia_vehicle', 'truck_number'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """Create pg_trgm GIN indexes for order list search"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index_name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name} ON {table} USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    """Drop the pg_trgm GIN indexes"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for index_name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sylvia', '0014_dealer_block_risk_fields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['organization', '-order_date'], name='sylvia_orde_organiz_ad03ef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['organization', 'mrn_date'], name='sylvia_orde_organiz_cf1fb8_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
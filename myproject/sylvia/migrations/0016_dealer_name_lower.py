@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:56
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sylvia', '0015_order_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dealer',
+            name='name_lower',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower('name'), output_field=models.CharField(max_length=200)),
+        ),
+        migrations.AddIndex(
+            model_name='dealer',
+            index=models.Index(fields=['organization', 'name_lower'], name='sylvia_deal_organiz_1587f1_idx'),
+        ),
+    ]
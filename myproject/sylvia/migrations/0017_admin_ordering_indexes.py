@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sylvia', '0016_dealer_name_lower'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['-created_at'], name='sylvia_audi_created_c8e703_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['organization', '-created_at'], name='sylvia_audi_organiz_d22a96_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['action', '-created_at'], name='sylvia_audi_action_f21ed9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dealercontext',
+            index=models.Index(fields=['-interaction_date'], name='sylvia_deal_interac_dcb9fc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mrn',
+            index=models.Index(fields=['-mrn_date'], name='sylvia_mrn_mrn_dat_6ac48a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-order_date'], name='sylvia_orde_order_d_2ce4b1_idx'),
+        ),
+    ]
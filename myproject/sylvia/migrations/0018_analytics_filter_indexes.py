@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sylvia', '0017_admin_ordering_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['organization', 'vehicle', '-order_date'], name='sylvia_orde_organiz_f7b204_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['organization', 'bill_date'], name='sylvia_orde_organiz_eedc6c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status__in', ['PENDING', 'CONFIRMED'])), fields=['organization', '-order_date'], name='sylvia_order_open_idx'),
+        ),
+    ]
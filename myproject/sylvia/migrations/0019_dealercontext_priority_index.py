@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sylvia', '0018_analytics_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dealercontext',
+            index=models.Index(fields=['priority_level', '-interaction_date'], name='sylvia_deal_priorit_fa9aad_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sylvia', '0019_dealercontext_priority_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dealercontext',
+            index=models.Index(condition=models.Q(('follow_up_required', True), ('issue_resolved', False)), fields=['follow_up_date'], name='sylvia_dc_followup_due_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import User
 from django.core.validators import RegexValidator
 from django.utils import timezone
@@ -202,6 +203,12 @@ class Product(TenantBaseModel):
 class Dealer(TenantBaseModel):
     """Model for dealers/customers"""
     name = models.CharField(max_length=200)
+    # Database-maintained lowercase name for indexable case-insensitive lookups
+    name_lower = models.GeneratedField(
+        expression=Lower('name'),
+        output_field=models.CharField(max_length=200),
+        db_persist=True,
+    )
     code = models.CharField(max_length=20)  # unique=True removed - will be org-scoped
     contact_person = models.CharField(max_length=100, blank=True)
     phone = models.CharField(max_length=15, validators=[
@@ -256,6 +263,7 @@ class Dealer(TenantBaseModel):
         indexes = [
             models.Index(fields=['organization', 'is_active']),
             models.Index(fields=['organization', 'name']),
+            models.Index(fields=['organization', 'name_lower']),  # Case-insensitive name matches
             models.Index(fields=['gstin']),
             models.Index(fields=['organization', 'is_blocked']),
             models.Index(fields=['organization', 'risk_flag']),
@@ -395,10 +403,20 @@ class Order(TenantBaseModel):
             ('organization', 'order_number'),
         ]
         indexes = [
+            models.Index(fields=['-order_date']),  # Admin changelist ordering
+            models.Index(fields=['organization', '-order_date']),  # Default order list ordering
             models.Index(fields=['organization', 'status', '-order_date']),  # Filter by status
             models.Index(fields=['organization', 'dealer', '-order_date']),  # Dealer's orders
             models.Index(fields=['organization', 'depot', '-order_date']),  # Depot's orders
+            models.Index(fields=['organization', 'vehicle', '-order_date']),  # Vehicle's orders
             models.Index(fields=['organization', 'order_number']),  # Quick order lookups
+            models.Index(fields=['organization', 'mrn_date']),  # MRNs created on a given day
+            models.Index(fields=['organization', 'bill_date']),  # Orders billed on a given day
+            models.Index(
+                fields=['organization', '-order_date'],
+                condition=models.Q(status__in=['PENDING', 'CONFIRMED']),
+                name='sylvia_order_open_idx',
+            ),  # Pending/confirmed orders only
             models.Index(fields=['whatsapp_sent', 'status']),  # WhatsApp sending queue
         ]
 
@@ -451,6 +469,7 @@ class MRN(TenantBaseModel):
             ('organization', 'mrn_number'),
         ]
         indexes = [
+            models.Index(fields=['-mrn_date']),  # Admin changelist ordering
             models.Index(fields=['organization', 'status', '-mrn_date']),  # Filter MRNs by status
             models.Index(fields=['organization', 'mrn_number']),  # Quick MRN lookups
         ]
@@ -526,6 +545,11 @@ class AuditLog(TenantBaseModel):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at']),  # Admin changelist ordering
+            models.Index(fields=['organization', '-created_at']),
+            models.Index(fields=['action', '-created_at']),  # Filter by action
+        ]
 
 # Additional utility models for system configuration
 class AppSettings(TenantBaseModel):
@@ -728,9 +752,16 @@ class DealerContext(TenantBaseModel):
         verbose_name = "Dealer Context"
         verbose_name_plural = "Dealer Contexts"
         indexes = [
+            models.Index(fields=['-interaction_date']),  # Admin changelist ordering
             models.Index(fields=['dealer', '-interaction_date']),
             models.Index(fields=['interaction_type', '-interaction_date']),
             models.Index(fields=['sentiment', 'priority_level']),
+            models.Index(fields=['priority_level', '-interaction_date']),  # High-priority contexts
             models.Index(fields=['follow_up_required', 'follow_up_date']),
+            models.Index(
+                fields=['follow_up_date'],
+                condition=models.Q(follow_up_required=True, issue_resolved=False),
+                name='sylvia_dc_followup_due_idx',
+            ),  # Open follow-ups only
             models.Index(fields=['reliability_score', 'trust_level']),
         ]
\ No newline at end of file
@@ -221,7 +221,8 @@ class OrderSerializer(serializers.ModelSerializer):
     
     def get_primary_mrn_image(self, obj):
         """Get the primary MRN image for this order"""
-        primary_image = obj.mrn_images.filter(is_primary=True).first()
+        # Scan the (usually prefetched) images rather than querying per order
+        primary_image = next((image for image in obj.mrn_images.all() if image.is_primary), None)
         return OrderMRNImageSerializer(primary_image).data if primary_image else None
 
 
@@ -280,6 +281,15 @@ class NotificationTemplateSerializer(serializers.ModelSerializer):
 
 
 # Dashboard/Analytics serializers
+class OrderSummarySerializer(serializers.Serializer):
+    """Flat order row for per-dealer and per-vehicle order lists"""
+    id = serializers.IntegerField()
+    order_number = serializers.CharField()
+    status = serializers.CharField()
+    order_date = serializers.DateTimeField()
+    total_quantity = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+
 class DashboardStatsSerializer(serializers.Serializer):
     orders_created_today = serializers.IntegerField()
     orders_billed_today = serializers.IntegerField()
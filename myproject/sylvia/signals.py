@@ -0,0 +1,84 @@
+"""
+Django signals for keeping cached API dashboard and BI data fresh.
+"""
+
+import threading
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Order, OrderItem, Dealer, Vehicle
+from .api_views import dashboard_stats_cache_key
+
+# Invalidations queued by the current thread's open transaction
+_pending = threading.local()
+
+
+def invalidate_after_commit(invalidate, organization_id):
+    """Queue invalidate(organization_id) to run once per transaction, after it commits"""
+    pending = getattr(_pending, 'invalidations', None)
+    if pending is None:
+        pending = _pending.invalidations = set()
+    pending.add((invalidate, organization_id))
+    # Outside a transaction this runs immediately; inside one, the first
+    # callback to run after commit drains the queue and the rest find it empty
+    transaction.on_commit(run_pending_invalidations)
+
+
+def run_pending_invalidations():
+    """Run every queued invalidation once"""
+    pending = getattr(_pending, 'invalidations', None) or set()
+    _pending.invalidations = set()
+    for invalidate, organization_id in pending:
+        invalidate(organization_id)
+
+
+def drop_dashboard_stats(organization_id):
+    """Drop the cached dashboard counts of one organization"""
+    cache.delete(dashboard_stats_cache_key(organization_id))
+
+
+def bump_bi_payloads(organization_id):
+    """Retire the cached BI payloads of one organization"""
+    # Imported here so the BI views keep loading lazily on first use
+    from .bi_views import bump_bi_cache_version
+
+    bump_bi_cache_version(organization_id)
+
+
+def drop_active_vehicles(organization_id):
+    """Drop the cached active vehicle count of one organization"""
+    from .bi_views import active_vehicles_cache_key
+
+    cache.delete(active_vehicles_cache_key(organization_id))
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=Dealer)
+@receiver(post_delete, sender=Dealer)
+@receiver(post_save, sender=Vehicle)
+@receiver(post_delete, sender=Vehicle)
+def invalidate_dashboard_stats(sender, instance, **kwargs):
+    """Drop the cached dashboard counts once the instance's transaction commits"""
+    invalidate_after_commit(drop_dashboard_stats, instance.organization_id)
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+@receiver(post_save, sender=Vehicle)
+@receiver(post_delete, sender=Vehicle)
+def invalidate_bi_payloads(sender, instance, **kwargs):
+    """Retire the cached BI payloads of the instance's organization once its transaction commits"""
+    invalidate_after_commit(bump_bi_payloads, instance.organization_id)
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_delete, sender=Vehicle)
+def invalidate_active_vehicles(sender, instance, **kwargs):
+    """Drop the cached active vehicle count once the vehicle's transaction commits"""
+    invalidate_after_commit(drop_active_vehicles, instance.organization_id)
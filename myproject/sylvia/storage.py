@@ -2,6 +2,8 @@ import os
 import uuid
 import mimetypes
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import hashlib
 import hmac
 import datetime
@@ -26,6 +28,23 @@ class KrutrimStorageClient:
         if not self.access_key or not self.secret_key or not self.endpoint_url:
             raise ValueError("Krutrim Storage credentials not properly configured. Please set KRUTRIM_STORAGE_ACCESS_KEY, KRUTRIM_STORAGE_API_KEY and KRUTRIM_STORAGE_ENDPOINT in your environment variables.")
         
+        # Reuse keep-alive connections to the storage endpoint across requests.
+        # There is one storage host, and gunicorn's sync workers serve one request
+        # at a time, so a small pool leaves ample room for a threaded worker.
+        # Exhausted retries hand back the last response so callers can report its status.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=10,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.1,
+                status_forcelist=[502, 503, 504],
+                raise_on_status=False
+            )
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
     
     def _create_auth_headers_v4(self, method: str, url: str, content_type: str = 'application/octet-stream', payload_hash: str = None) -> dict:
         """Create AWS Signature Version 4 authorization headers for Krutrim Storage"""
@@ -172,7 +191,7 @@ class KrutrimStorageClient:
             
             # Upload file using HTTP PUT request
             try:
-                response = requests.put(
+                response = self.session.put(
                     upload_url,
                     data=file_content,
                     headers=headers,
@@ -244,7 +263,7 @@ class KrutrimStorageClient:
 
             # Upload file using HTTP PUT request
             try:
-                response = requests.put(
+                response = self.session.put(
                     upload_url,
                     data=file_content,
                     headers=headers,
@@ -288,7 +307,7 @@ class KrutrimStorageClient:
             headers = self._create_auth_headers_v4(method='DELETE', url=delete_url, content_type='')
             
             try:
-                response = requests.delete(
+                response = self.session.delete(
                     delete_url,
                     headers=headers,
                     timeout=30
@@ -390,7 +409,7 @@ class KrutrimStorageClient:
             headers = self._create_auth_headers_v4(method='HEAD', url=head_url, content_type='')
             
             try:
-                response = requests.head(
+                response = self.session.head(
                     head_url,
                     headers=headers,
                     timeout=30
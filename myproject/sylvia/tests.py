@@ -1,3 +1,180 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .middleware import set_current_organization
+from .models import (
+    Organization, UserProfile, Depot, Product, Dealer, Vehicle, Order, OrderItem, OrderMRNImage
+)
+
+
+class TenantTestCase(TestCase):
+    """Logged-in user of one organization, with a depot, product, dealer and vehicle"""
+
+    def setUp(self):
+        cache.clear()
+        self.organization = Organization.objects.create(name='Test Org', slug='test-org')
+        self.user = User.objects.create_user(username='tester', password='secret')
+        UserProfile.objects.create(user=self.user, organization=self.organization)
+
+        # Tenant models take their organization from the thread-local context
+        set_current_organization(self.organization)
+        self.addCleanup(set_current_organization, None)
+        self.depot = Depot.objects.create(name='Depot', code='DEP', city='City', state='State')
+        self.product = Product.objects.create(name='Cement', code='CEM')
+        self.other_product = Product.objects.create(name='Clinker', code='CLK')
+        self.dealer = Dealer.objects.create(name='Dealer', code='DLR', phone='9999999999')
+        self.vehicle = Vehicle.objects.create(truck_number='CG15EA0464')
+
+        self.client.login(username='tester', password='secret')
+
+    def create_order(self, order_date, items=(), dealer=None, **kwargs):
+        """Create an order, for the test dealer by default, with (product, quantity, unit_price) items"""
+        order = Order.objects.create(
+            dealer=dealer or self.dealer, vehicle=self.vehicle, depot=self.depot, order_date=order_date, **kwargs
+        )
+        for product, quantity, unit_price in items:
+            OrderItem.objects.create(
+                order=order, product=product, quantity=Decimal(quantity), unit_price=Decimal(unit_price)
+            )
+        return order
+
+
+class DealerStatisticsTests(TenantTestCase):
+
+    def test_total_value_sums_each_item_value(self):
+        now = timezone.now()
+        self.create_order(now, [(self.product, '10', '5'), (self.other_product, '2', '100')])
+        self.create_order(now - timedelta(days=10), [(self.product, '3', '20')])
+
+        response = self.client.get(f'/api/v1/dealers/{self.dealer.id}/statistics/')
+
+        self.assertEqual(response.status_code, 200)
+        # 10*5 + 2*100 + 3*20, not the product of the quantity and price sums
+        self.assertEqual(Decimal(response.data['total_value']), Decimal('310'))
+        self.assertEqual(response.data['total_orders'], 2)
+        self.assertEqual(response.data['weekly_orders'], 1)
+
+
+class OrderListCursorTests(TenantTestCase):
+
+    def test_cursor_pages_cover_tied_order_dates_once(self):
+        base = timezone.now().replace(microsecond=0)
+        # Groups of five orders share an order_date, so ties straddle page boundaries
+        orders = [self.create_order(base - timedelta(hours=i // 5)) for i in range(51)]
+        expected_ids = [
+            order.id for order in sorted(orders, key=lambda order: (order.order_date, order.id), reverse=True)
+        ]
+
+        seen_ids = []
+        params = {}
+        for _ in range(len(orders)):
+            response = self.client.get('/orders/orders/', params)
+            self.assertEqual(response.status_code, 200)
+            seen_ids.extend(order.id for order in response.context['orders'])
+            if not response.context['has_next']:
+                break
+            params = {'after': response.context['next_cursor']}
+
+        self.assertEqual(seen_ids, expected_ids)
+
+
+class ExecutiveSummaryDateWindowTests(TenantTestCase):
+
+    def test_default_window_excludes_orders_older_than_a_year(self):
+        now = timezone.now()
+        self.create_order(now, [(self.product, '1', '1')])
+        self.create_order(now - timedelta(days=400), [(self.product, '1', '1')])
+
+        bounded = self.client.get('/api/v1/bi/executive-summary/')
+        unbounded = self.client.get('/api/v1/bi/executive-summary/', {'start_date': 'all'})
+
+        self.assertEqual(bounded.data['kpis']['total_orders'], 1)
+        self.assertEqual(unbounded.data['kpis']['total_orders'], 2)
+        self.assertEqual(unbounded.data['date_range'], 'All time')
+
+
+class StockAnalyticsTests(TenantTestCase):
+
+    def test_stock_orders_count_orders_not_items(self):
+        anonymous = Dealer.objects.create(name='Anonymous', code='ANON', phone='9999999999')
+        self.create_order(
+            timezone.now(), [(self.product, '10', '5'), (self.other_product, '4', '5')], dealer=anonymous
+        )
+
+        for params in ({}, {'product_ids[]': [self.product.id, self.other_product.id]}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/v1/bi/stock-analytics/', params)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['stock_summary']['total_stock_orders'], 1)
+                self.assertEqual(response.data['stock_by_depot'][0]['stock_orders'], 1)
+                self.assertEqual(response.data['stock_summary']['total_stock_quantity'], 14.0)
+
+
+class SetPrimaryImageTests(TenantTestCase):
+
+    def test_response_reports_stored_flag_and_timestamp(self):
+        order = self.create_order(timezone.now())
+        images = [
+            OrderMRNImage.objects.create(
+                order=order, image_url='x', storage_key=f'k/{i}.jpg', original_filename=f'{i}.jpg',
+                created_by=self.user, is_primary=(i == 0)
+            )
+            for i in range(2)
+        ]
+
+        response = self.client.post(f'/api/v1/mrn-images/{images[1].id}/set_primary/')
+
+        self.assertEqual(response.status_code, 200)
+        for image in images:
+            image.refresh_from_db()
+        self.assertFalse(images[0].is_primary)
+        self.assertTrue(images[1].is_primary)
+        self.assertTrue(response.data['is_primary'])
+        self.assertEqual(parse_datetime(response.data['updated_at']), images[1].updated_at)
+
+
+class DispatchEntityCreationTests(TenantTestCase):
+
+    def test_inactive_vehicle_is_reported_as_reused(self):
+        from orders.views_dispatch_table import create_missing_entities
+
+        inactive = Vehicle.objects.create(truck_number='OD02AB1234', is_active=False)
+
+        created = create_missing_entities(
+            {'depots': [], 'vehicles': ['OD02AB1234', 'OD02AB5678'], 'products': [], 'dealers': []},
+            {'rows': []}
+        )
+
+        self.assertEqual(created['vehicles']['OD02AB1234'], inactive)
+        self.assertIn('Reused existing vehicle: OD02AB1234 (inactive)', created['log'])
+        self.assertIn('Created vehicle: OD02AB5678 (Owner: Unknown)', created['log'])
+        self.assertNotIn('Created vehicle: OD02AB1234 (Owner: Unknown)', created['log'])
+
+
+class ProductFuzzyMatchTests(SimpleTestCase):
+
+    def match(self, product_key, names):
+        from orders.views_dispatch_table import build_product_token_index, match_product_fuzzy
+
+        existing_products = {name: {'name': name} for name in names}
+        product = match_product_fuzzy(product_key, existing_products, build_product_token_index(existing_products))
+        return product and product['name']
+
+    def test_name_containing_every_key_token_wins_over_earlier_substring(self):
+        # An in-order scan binds "ultra cement" to "cem", the first name inside the key
+        self.assertEqual(self.match('ultra cement', ['cem', 'ultra cement plus']), 'ultra cement plus')
+
+    def test_candidates_are_tried_in_product_order(self):
+        self.assertEqual(self.match('ultra', ['ultra cement', 'ultra tech']), 'ultra cement')
+
+    def test_falls_back_to_substring_scan(self):
+        self.assertEqual(self.match('ultra cement ppc', ['cem', 'ultra cement']), 'cem')
+        self.assertEqual(self.match('powermax', ['powermax-lpp']), 'powermax-lpp')
+        self.assertIsNone(self.match('clinker', ['cem', 'ultra cement']))